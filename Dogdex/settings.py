@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     "drf_yasg",
     'django_filters',
@@ -45,10 +46,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -95,6 +98,57 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 5000},  # LRU: descarta as menos usadas acima disso
+    }
+}
+
+# Cache de respostas dos ViewSets (api/cache.py); ALIAS aponta para uma entrada de CACHES.
+# Com mais de um worker, ligue só com um backend compartilhado (ex.: django.core.cache.backends.redis.RedisCache):
+# no LocMemCache a invalidação não chega aos outros processos e eles servem respostas antigas até o TIMEOUT.
+DOGDEX_RESPONSE_CACHE = {
+    "ENABLED": False,
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Máximo de ids em `?ids=a,b,c` (busca em lote nos endpoints de list)
+DOGDEX_BATCH_MAX_IDS = 100
+
+# Delta de /api/sync/ para os tablets (api/sync.py)
+DOGDEX_SYNC = {
+    "PAGE_SIZE": 500,
+    "OVERLAP_SECONDS": 60,  # recuo do `since` entre rodadas, para commits atrasados
+    "TOMBSTONE_DAYS": 30,   # tokens mais antigos exigem sincronização completa
+}
+
+# Métricas por rota em /metrics (api/metrics.py); cada worker grava um snapshot em DIRECTORY
+DOGDEX_METRICS = {
+    "DIRECTORY": None,  # padrão: <tmp>/dogdex-metrics; limpe a cada deploy
+    "SLOW_QUERY_MS": 500,  # acima disso a query vai para o log api.metrics com o EXPLAIN
+    "TOKEN": None,  # Bearer do Prometheus; sem ele, /metrics só para staff logado
+}
+
+# Profiling por amostragem (api/profiling.py); desligado não custa nada. Perfis em /api/profiles/
+DOGDEX_PROFILING = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.01,  # fração das requisições nas rotas de ROUTES; staff força com `X-Dogdex-Profile: 1`
+    "MODE": "cprofile",   # "sampling" para stacks colapsadas (flamegraph)
+    "MAX_PROFILES": 50,
+}
+
+# Schema OpenAPI pré-gerado (`manage.py generate_schema`, api/schema.py), servido em /openapi.json
+DOGDEX_SCHEMA = {
+    "FILE": BASE_DIR / "openapi.json",
+    "MAX_AGE": 86400,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -148,4 +202,15 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    # JSON com orjson, mesma saída do JSONRenderer/JSONParser do DRF (api/renderers.py, api/parsers.py);
+    # sem o pacote orjson eles usam a implementação do DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
@@ -16,23 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import routers, permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from rest_framework import routers
 
+from api.schema import schema_json, swagger_ui
+from api.views import metrics
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Dogs API",
-        default_version="v1",
-        description="Documentação da API de Dogs",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contato@exemplo.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
 
 # Routers provide an easy way of automatically determining the URL conf.
 router = routers.DefaultRouter()
@@ -42,5 +30,8 @@ urlpatterns = [
     path('api/', include("api.urls")),
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls')),
-    path("", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
+    path("metrics", metrics, name="metrics"),
+    path("openapi.json", schema_json, name="schema-json"),
+    # página estática; o schema vem do /openapi.json pré-gerado
+    path("", swagger_ui, name="schema-swagger-ui"),
 ]
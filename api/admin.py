@@ -2,11 +2,15 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Dog, Owner, Health, ServiceRecord, ServiceType, Stay
+from .models import Dog, Owner, Health, ServiceRecord, ServiceType, Stay, BillingRollup, LiveEvent, ImportJob, Tombstone
 
 admin.site.register(Dog)
 admin.site.register(Owner)
 admin.site.register(Health)
 admin.site.register(ServiceType)
 admin.site.register(Stay)
-admin.site.register(ServiceRecord)
\ No newline at end of file
+admin.site.register(ServiceRecord)
+admin.site.register(BillingRollup)
+admin.site.register(LiveEvent)
+admin.site.register(Tombstone)
+admin.site.register(ImportJob)
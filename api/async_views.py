@@ -0,0 +1,132 @@
+"""
+Caminho de leitura async (ASGI) dos endpoints mais acessados.
+
+Views Django nativas (o DRF é síncrono) que usam o ORM async (`aget`,
+`async for`), então sob ASGI não prendem uma thread enquanto esperam o
+Postgres. Mesmo formato de resposta das versões síncronas; só leitura,
+que já é pública pela DjangoModelPermissionsOrAnonReadOnly.
+"""
+import uuid
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+from api import events, timeline
+from api.models import Dog, Owner, ServiceRecord, Stay
+from api.pagination import ServiceRecordCursorPagination, StayCursorPagination
+from api.serializers import DogSerializer, OwnerSerializer, ServiceRecordSerializer, StaySerializer
+
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_MAX_PAGE_SIZE = 200
+
+
+def json_response(data, status=200):
+    # mesmo encoder e formato compacto do JSONRenderer do DRF
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")})
+
+
+def id_filters(request, names):
+    """Filtros exatos por id (`?dog=`, `?owner=`); ValueError se algum não for UUID."""
+    return {name: uuid.UUID(request.GET[name]) for name in names if request.GET.get(name)}
+
+
+@require_GET
+async def dog_detail(request, pk):
+    try:
+        dog = await Dog.objects.select_related("owner").aget(pk=pk)
+    except Dog.DoesNotExist:
+        return json_response({"error": "Dog not found"}, status=404)
+    dog_serialized = DogSerializer(dog).data
+    dog_serialized.pop("owner", None)
+    return json_response({"dog": dog_serialized, "owner": OwnerSerializer(dog.owner).data})
+
+
+@require_GET
+async def owner_detail(request, pk):
+    try:
+        owner = await Owner.objects.aget(pk=pk)
+    except Owner.DoesNotExist:
+        return json_response({"error": "Owner not found"}, status=404)
+    return json_response({
+        "owner": OwnerSerializer(owner).data,
+        "dogs": [dog async for dog in Dog.objects.filter(owner=owner).values()],
+    })
+
+
+@require_GET
+async def dog_timeline(request, pk):
+    """Timeline do cão, mesmo UNION ALL da versão síncrona lido com o ORM async."""
+    try:
+        kinds, limit, before = timeline.parse_query(request.GET, TIMELINE_PAGE_SIZE, TIMELINE_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    if not await Dog.objects.filter(pk=pk).aexists():
+        return json_response({"error": "Dog not found"}, status=404)
+
+    rows = await timeline.afetch(pk, kinds, before, limit + 1)
+    next_link = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_link = request.build_absolute_uri()
+        for key, value in timeline.next_position(rows).items():
+            next_link = replace_query_param(next_link, key, value)
+    return json_response({
+        "next": next_link,
+        "results": [timeline.to_event(row) for row in rows],
+    })
+
+
+async def paginated_list(request, queryset, pagination_class, serializer_class):
+    try:
+        queryset = queryset.filter(**id_filters(request, ("dog", "owner")))
+    except ValueError:
+        return json_response({"error": "dog/owner devem ser UUIDs."}, status=400)
+    paginator = pagination_class()
+    try:
+        page = await paginator.apaginate_queryset(queryset, Request(request))
+    except NotFound as e:
+        return json_response({"detail": str(e.detail)}, status=404)
+    data = serializer_class(page, many=True).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+@require_GET
+async def stay_list(request):
+    """Stays paginadas por cursor (ordem padrão), com `?dog=` e `?owner=`."""
+    queryset = Stay.objects.select_related("dog", "dog__owner")
+    return await paginated_list(request, queryset, StayCursorPagination, StaySerializer)
+
+
+@require_GET
+async def service_list(request):
+    """ServiceRecords paginados por cursor (ordem padrão), com `?dog=` e `?owner=`."""
+    queryset = ServiceRecord.objects.select_related("dog", "owner", "service_type")
+    return await paginated_list(request, queryset, ServiceRecordCursorPagination, ServiceRecordSerializer)
+
+
+@require_GET
+async def live_events(request):
+    """
+    Server-Sent Events com as mudanças de stays e services (`?dog=`,
+    `?owner=`). Na reconexão o EventSource manda `Last-Event-ID` (ou use
+    `?last_event_id=`) e recebe o que perdeu, mais a janela de commits
+    atrasados (ids repetidos devem ser ignorados). Exige servidor ASGI.
+    """
+    try:
+        filters = id_filters(request, ("dog", "owner"))
+        resume_from = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        last_id = int(resume_from) if resume_from else await events.latest_id()
+    except ValueError:
+        return json_response({"error": "dog/owner devem ser UUIDs e last_event_id um inteiro."}, status=400)
+    response = StreamingHttpResponse(
+        events.stream(last_id, dog_id=filters.get("dog"), owner_id=filters.get("owner"), resumed=bool(resume_from)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: não bufferizar o stream
+    return response
@@ -0,0 +1,59 @@
+import uuid
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from api.expand import parse_tree
+
+DEFAULT_MAX_IDS = 100
+
+
+def max_ids():
+    return getattr(settings, "DOGDEX_BATCH_MAX_IDS", DEFAULT_MAX_IDS)
+
+
+def parse_ids(value):
+    """'a,b,c' -> lista de UUIDs sem repetição, na ordem pedida."""
+    ids = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.append(uuid.UUID(part))
+        except ValueError:
+            raise ValidationError({"ids": f"Id inválido: {part}."})
+    return list(dict.fromkeys(ids))
+
+
+class BatchListMixin:
+    """
+    `GET /recurso/?ids=a,b,c`: devolve esses objetos na ordem pedida, com
+    número fixo de queries, e os ids não encontrados em `missing`.
+    `batch_expand` é a expansão usada quando o pedido não traz `?expand=`.
+    """
+    batch_expand = ""
+
+    def is_batch(self):
+        return self.action == "list" and "ids" in self.request.query_params
+
+    def get_expand(self):
+        if self.is_batch() and "expand" not in self.request.query_params:
+            return parse_tree(self.batch_expand)
+        return super().get_expand()
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_batch():
+            return super().list(request, *args, **kwargs)
+        ids = parse_ids(request.query_params["ids"])
+        if not ids:
+            raise ValidationError({"ids": "Informe ao menos um id."})
+        if len(ids) > max_ids():
+            raise ValidationError({"ids": f"Máximo de {max_ids()} ids por requisição."})
+
+        found = self.get_queryset().in_bulk(ids)
+        return Response({
+            "results": self.get_serializer([found[pk] for pk in ids if pk in found], many=True).data,
+            "missing": [str(pk) for pk in ids if pk not in found],
+        })
@@ -0,0 +1,171 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import BillingRollup, ServiceRecord, Stay
+
+STAY_CURRENCY = "BRL"  # Stay não guarda moeda
+STAY_FIELDS = ("owner_id", "check_in", "price_total")
+SERVICE_FIELDS = ("owner_id", "service_type_id", "currency", "performed_at", "day", "price")
+
+
+def month_of(value):
+    """Primeiro dia do mês de uma data/datetime (no fuso de TIME_ZONE), ou None."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        value = value.date()
+    return value.replace(day=1)
+
+
+def parse_month(value):
+    """'YYYY-MM' -> date do primeiro dia; ValueError se inválido."""
+    return datetime.datetime.strptime(value, "%Y-%m").date()
+
+
+def stay_entry(values):
+    key = (values["owner_id"], month_of(values["check_in"]), None, STAY_CURRENCY)
+    return key, values["price_total"] or Decimal("0")
+
+
+def service_entry(values):
+    month = month_of(values["performed_at"] or values["day"])
+    key = (values["owner_id"], month, values["service_type_id"], values["currency"])
+    return key, values["price"] or Decimal("0")
+
+
+def deltas(entry, old=None, new=None, into=None):
+    """
+    Acumula em `into` ({chave: [total, count]}) a troca de `old` por `new`,
+    onde `old`/`new` são dicts com os campos de STAY_FIELDS/SERVICE_FIELDS.
+    """
+    into = into if into is not None else defaultdict(lambda: [Decimal("0"), 0])
+    for values, sign in ((old, -1), (new, 1)):
+        if values is None:
+            continue
+        key, amount = entry(values)
+        if key[1] is None:
+            continue  # sem data não entra em nenhum mês
+        into[key][0] += sign * amount
+        into[key][1] += sign
+    return into
+
+
+def apply(changes):
+    """
+    Soma os deltas no rollup com um único INSERT ... ON CONFLICT DO UPDATE e
+    apaga as linhas que voltaram a zero (não sobra linha vazia apontando
+    para um tutor ou tipo de serviço sem registros).
+    """
+    rows = [(key, total, count) for key, (total, count) in changes.items() if total or count]
+    if not rows:
+        return
+    rows.sort(key=lambda row: str(row[0]))  # ordem fixa de lock entre transações concorrentes
+    table = BillingRollup._meta.db_table
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+    params = []
+    for (owner_id, month, service_type_id, currency), total, count in rows:
+        params += [BillingRollup._meta.pk.get_default(), owner_id, month, service_type_id, currency, total, count]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (id, owner_id, month, service_type_id, currency, total, count) "
+            f"VALUES {values} "
+            f"ON CONFLICT (owner_id, month, service_type_id, currency) DO UPDATE SET "
+            f"total = {table}.total + EXCLUDED.total, count = {table}.count + EXCLUDED.count "
+            f"RETURNING id, total, count",
+            params,
+        )
+        empty = [row_id for row_id, total, count in cursor.fetchall() if not total and not count]
+        if empty:
+            cursor.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", [empty])
+
+
+def aggregate_raw(start, end):
+    """Agrega Stay e ServiceRecord dos meses [start, end] direto das tabelas brutas."""
+    totals = {}
+    after_end = (end + datetime.timedelta(days=32)).replace(day=1)
+    services = (
+        ServiceRecord.objects.order_by()
+        # o filtro em event_date só lê as partições dos meses pedidos
+        .filter(event_date__gte=start, event_date__lt=after_end)
+        # mesmo mês de service_entry: event_date já é o dia local de performed_at ou day
+        .annotate(month=TruncMonth("event_date"))
+        .values("owner_id", "month", "service_type_id", "currency")
+        .annotate(total=Coalesce(Sum("price"), Decimal("0")), count=Count("id"))
+    )
+    for row in services:
+        key = (row["owner_id"], month_of(row["month"]), row["service_type_id"], row["currency"])
+        totals[key] = (row["total"], row["count"])
+
+    stays = (
+        Stay.objects.order_by()
+        .annotate(month=TruncMonth("check_in"))
+        .filter(month__date__gte=start, month__date__lte=end)
+        .values("owner_id", "month")
+        .annotate(total=Sum("price_total"), count=Count("id"))
+    )
+    for row in stays:
+        key = (row["owner_id"], month_of(row["month"]), None, STAY_CURRENCY)
+        totals[key] = (row["total"], row["count"])
+    return totals
+
+
+def stored(start, end):
+    return {
+        (row.owner_id, row.month, row.service_type_id, row.currency): (row.total, row.count)
+        for row in BillingRollup.objects.filter(month__gte=start, month__lte=end)
+    }
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """Recalcula do zero o rollup dos meses [start, end]; devolve o número de linhas."""
+    BillingRollup.objects.filter(month__gte=start, month__lte=end).delete()
+    rows = [
+        BillingRollup(owner_id=owner_id, month=month, service_type_id=service_type_id, currency=currency,
+                      total=total, count=count)
+        for (owner_id, month, service_type_id, currency), (total, count) in aggregate_raw(start, end).items()
+    ]
+    BillingRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def differences(start, end):
+    """Chaves em que o rollup diverge dos dados brutos: {chave: (rollup, bruto)}."""
+    expected = aggregate_raw(start, end)
+    current = {key: value for key, value in stored(start, end).items() if value != (Decimal("0"), 0)}
+    return {
+        key: (current.get(key), expected.get(key))
+        for key in current.keys() | expected.keys()
+        if current.get(key) != expected.get(key)
+    }
+
+
+def summary(month, owner=None):
+    """Linhas (tipo de serviço, moeda) e totais por moeda do mês, lidas só do rollup."""
+    queryset = BillingRollup.objects.filter(month=month)
+    if owner is not None:
+        queryset = queryset.filter(owner=owner)
+    rows = (
+        queryset.values("service_type", "currency")
+        .annotate(name=F("service_type__name"), line_total=Sum("total"), line_count=Sum("count"))
+        .filter(line_count__gt=0)
+        .order_by("currency", "name")
+    )
+    lines, totals = [], defaultdict(Decimal)
+    for row in rows:
+        lines.append({
+            "service_type": row["service_type"],
+            "service_type_name": row["name"] or "Hospedagem",
+            "currency": row["currency"],
+            "total": row["line_total"],
+            "count": row["line_count"],
+        })
+        totals[row["currency"]] += row["line_total"]
+    return lines, dict(totals)
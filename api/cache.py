@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+DEFAULTS = {
+    # desligado por padrão: só é coerente entre workers com um backend compartilhado (Redis, Memcached)
+    "ENABLED": False,
+    "ALIAS": "default",  # qualquer backend de CACHES; o padrão do Django é LocMemCache (LRU, por processo)
+    "TIMEOUT": 300,
+    "KEY_PREFIX": "dogdex:response",
+}
+
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+_stats_lock = threading.Lock()
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, "DOGDEX_RESPONSE_CACHE", {})}
+
+
+def get_cache():
+    return caches[cache_settings()["ALIAS"]]
+
+
+def _generation_key(model):
+    return f"{cache_settings()['KEY_PREFIX']}:gen:{model._meta.label_lower}"
+
+
+def generations(models):
+    """Versão atual de cada model; entra na chave, então invalidar = incrementar."""
+    keys = [_generation_key(model) for model in models]
+    values = get_cache().get_many(keys)
+    return [values.get(key, 0) for key in keys]
+
+
+def invalidate(*models):
+    """Descarta (por versão) todas as respostas que dependem de `models`, após o commit."""
+    def bump():
+        cache = get_cache()
+        for model in models:
+            key = _generation_key(model)
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key)
+            except ValueError:  # expirou/foi descartada entre o add e o incr
+                cache.set(key, 1, timeout=None)
+    transaction.on_commit(bump)
+
+
+def permissions_fingerprint(user):
+    if not user or not user.is_authenticated:
+        return "anon"
+    if user.is_superuser:
+        return "superuser"
+    return hashlib.sha1(",".join(sorted(user.get_all_permissions())).encode()).hexdigest()
+
+
+def record(label, hit):
+    with _stats_lock:
+        _stats[label]["hits" if hit else "misses"] += 1
+
+
+def stats():
+    """Contadores de hit/miss deste processo, por view."""
+    with _stats_lock:
+        return {label: dict(counts) for label, counts in _stats.items()}
+
+
+class CachedResponseMixin:
+    """
+    Cache de leitura para ViewSets: guarda `response.data` das actions em
+    `cache_actions` (GET 200), com chave por path, query string, permissões
+    do usuário e versão de cada model em `cache_dependencies`. Os signals em
+    api/signals.py incrementam a versão do model em cada save/delete; LRU e
+    TTL ficam por conta do backend.
+
+    As versões moram no próprio backend: com Redis/Memcached todo worker vê
+    o incremento e nenhuma entrada obsoleta é servida. Com LocMemCache cada
+    processo tem as suas, e uma gravação tratada por um worker não invalida
+    os outros, que podem servir a resposta antiga por até TIMEOUT segundos.
+    """
+    cache_actions = ("list", "retrieve")
+    cache_dependencies = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # autenticação e permissões já passaram; o dispatch busca o handler depois daqui
+        if (request.method == "GET" and self.action in self.cache_actions
+                and cache_settings()["ENABLED"]):
+            self.get = self._cached_handler(self.get)
+
+    def cache_label(self):
+        return f"{self.basename}-{self.action}"
+
+    def cache_key(self, request):
+        query = sorted(request.query_params.lists())
+        versions = generations(self.cache_dependencies)
+        raw = f"{request.path}?{query}|{permissions_fingerprint(request.user)}|{versions}"
+        return f"{cache_settings()['KEY_PREFIX']}:{self.cache_label()}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    def _cached_handler(self, handler):
+        def cached(request, *args, **kwargs):
+            cache = get_cache()
+            key = self.cache_key(request)
+            data = cache.get(key)
+            record(self.cache_label(), data is not None)
+            if data is not None:
+                return Response(data)
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, cache_settings()["TIMEOUT"])
+            return response
+        return cached
@@ -0,0 +1,58 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Dog
+
+
+def dog_version_token(dog_id):
+    """
+    ETag fraco do cão: revision (health, stays e services) + updated_at do
+    cão e do tutor, lidos numa única query por pk.
+    """
+    try:
+        row = Dog.objects.filter(pk=dog_id).values_list("revision", "updated_at", "owner__updated_at").first()
+    except (ValidationError, ValueError):
+        return None  # pk que não é UUID: a view responde 404
+    if row is None:
+        return None
+    digest = hashlib.sha1(repr(row).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request, etag):
+    """Comparação fraca com If-None-Match (RFC 9110 §13.1.2)."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+class ConditionalGetMixin:
+    """
+    GET condicional para ViewSets: `etag_actions` mapeia action -> nome do
+    método que devolve o ETag (ou None). Com If-None-Match igual, responde
+    304 antes de consultar o cache de respostas ou serializar qualquer coisa.
+    """
+    etag_actions = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == "GET" and self.action in self.etag_actions:
+            self.get = self._conditional_handler(self.get, getattr(self, self.etag_actions[self.action]))
+
+    def _conditional_handler(self, handler, etag_func):
+        def conditional(request, *args, **kwargs):
+            etag = etag_func(request, *args, **kwargs)
+            if etag and etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            response = handler(request, *args, **kwargs)
+            if etag and response.status_code == status.HTTP_200_OK:
+                response["ETag"] = etag
+            return response
+        return conditional
@@ -0,0 +1,205 @@
+"""
+Eventos em tempo real de hospedagens e serviços (telas da recepção/canil).
+
+Os signals gravam um LiveEvent por mudança e chamam pg_notify na mesma
+transação; o Postgres só entrega o NOTIFY no commit, então nenhum cliente
+vê evento de transação desfeita. Cada processo mantém uma thread com
+LISTEN que acorda os streams SSE inscritos, e cada stream lê os eventos
+da tabela a partir do último id entregue, o que também dá o resume por
+`Last-Event-ID`. Nenhum broker externo é necessário.
+
+O id vem da sequence no INSERT, não no commit: uma transação pode gravar
+o 101 e commitar depois de o 102 já ter sido entregue. Por isso cada
+leitura também relê os eventos criados nos últimos LATE_SECONDS com id
+abaixo do último entregue, descartando os que o stream já mandou. No
+resume por `Last-Event-ID` essa janela é reenviada inteira, então o
+cliente deve ignorar ids que já viu.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections
+from django.utils import timezone
+
+from .models import LiveEvent
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "dogdex_events"
+RETRY_MS = 3000  # intervalo de reconexão sugerido ao EventSource
+HEARTBEAT_SECONDS = 15
+BATCH_SIZE = 500
+LATE_SECONDS = 60  # janela relida para eventos de transações que commitaram fora da ordem dos ids
+
+STAY_PAYLOAD_FIELDS = ("dog_id", "owner_id", "check_in", "check_out", "price_total")
+SERVICE_PAYLOAD_FIELDS = ("dog_id", "owner_id", "service_type_id", "stay_id", "performed_at", "day", "price",
+                          "currency")
+
+
+def build(kind, instance, fields):
+    return LiveEvent(
+        kind=kind,
+        object_id=instance.pk,
+        dog_id=instance.dog_id,
+        owner_id=instance.owner_id,
+        payload={name.removesuffix("_id"): getattr(instance, name) for name in fields},
+    )
+
+
+def stay_event(action, instance):
+    return build(f"stay.{action}", instance, STAY_PAYLOAD_FIELDS)
+
+
+def service_event(action, instance):
+    return build(f"service.{action}", instance, SERVICE_PAYLOAD_FIELDS)
+
+
+def publish(*events):
+    """Grava os eventos e manda um NOTIFY por evento (entregue só no commit)."""
+    if not events:
+        return
+    events = LiveEvent.objects.bulk_create(events)
+    messages = [
+        json.dumps({"id": event.id, "dog": str(event.dog_id), "owner": str(event.owner_id)})
+        for event in events
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, message) FROM unnest(%s::text[]) AS message", [CHANNEL, messages])
+
+
+def matches(message, filters):
+    return message is None or all(message.get(key) == value for key, value in filters.items())
+
+
+class Listener:
+    """Thread por processo com LISTEN no canal; repassa cada NOTIFY às filas dos streams."""
+    poll_timeout = 5
+    reconnect_delay = 2
+
+    def __init__(self):
+        self.subscribers = {}  # fila -> (event loop, filtros)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, filters):
+        queue = asyncio.Queue()
+        with self.lock:
+            self.subscribers[queue] = (asyncio.get_running_loop(), filters)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="dogdex-events", daemon=True)
+                self.thread.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers.pop(queue, None)
+
+    def dispatch(self, message):
+        """`message` None acorda todos (ex.: após reconectar, algum NOTIFY pode ter se perdido)."""
+        with self.lock:
+            subscribers = list(self.subscribers.items())
+        for queue, (loop, filters) in subscribers:
+            if matches(message, filters):
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, message)
+                except RuntimeError:  # loop já encerrado
+                    self.unsubscribe(queue)
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception("LISTEN %s caiu; reconectando.", CHANNEL)
+            time.sleep(self.reconnect_delay)
+
+    def listen(self):
+        database = connections["default"]
+        conn = database.get_new_connection(database.get_connection_params())
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            self.dispatch(None)
+            while True:
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        self.dispatch(json.loads(notify.payload))
+                    except ValueError:
+                        self.dispatch(None)
+        finally:
+            conn.close()
+
+
+listener = Listener()
+
+
+def format_event(event):
+    data = json.dumps({
+        "id": event.id,
+        "kind": event.kind,
+        "object_id": event.object_id,
+        "dog": event.dog_id,
+        "owner": event.owner_id,
+        "payload": event.payload,
+        "created_at": event.created_at,
+    }, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+async def latest_id():
+    return await LiveEvent.objects.order_by("-id").values_list("id", flat=True).afirst() or 0
+
+
+async def stream(last_id, dog_id=None, owner_id=None, resumed=False):
+    """
+    Gerador SSE: entrega os eventos com id > `last_id` que casam com os
+    filtros, mais os que commitaram atrasados (janela de LATE_SECONDS), e
+    espera o próximo NOTIFY (com heartbeat, que também relê a tabela caso
+    algum aviso tenha se perdido). Sem `resumed`, eventos criados antes da
+    conexão não são enviados.
+    """
+    query = {key: value for key, value in (("dog_id", dog_id), ("owner_id", owner_id)) if value}
+    queue = listener.subscribe({key.removesuffix("_id"): str(value) for key, value in query.items()})
+    connected_at = None if resumed else timezone.now()
+    delivered = {}  # id -> created_at dos eventos entregues ainda dentro da janela
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            since = timezone.now() - timedelta(seconds=LATE_SECONDS)
+            if connected_at is not None:
+                since = max(since, connected_at)
+            delivered = {event_id: created for event_id, created in delivered.items() if created >= since}
+            late = [
+                event async for event in
+                LiveEvent.objects.filter(id__lte=last_id, created_at__gte=since, **query)
+                .exclude(id__in=list(delivered)).order_by("id")
+            ]
+            events = [
+                event async for event in
+                LiveEvent.objects.filter(id__gt=last_id, **query).order_by("id")[:BATCH_SIZE]
+            ]
+            for event in (*late, *events):
+                yield format_event(event)
+                delivered[event.id] = event.created_at
+            if events:
+                last_id = events[-1].id
+            if len(events) == BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+            while not queue.empty():
+                queue.get_nowait()
+    finally:
+        listener.unsubscribe(queue)
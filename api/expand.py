@@ -0,0 +1,152 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_tree(value):
+    """'dogs,dogs.health,owner' -> {'dogs': {'health': {}}, 'owner': {}}"""
+    tree = {}
+    for path in (value or "").split(","):
+        node = tree
+        for part in path.strip().split("."):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class Expansion:
+    """
+    Relação que pode ser expandida via `?expand=` num serializer.
+
+    Exatamente um entre `select_related` (FK/one-to-one) e `prefetch`
+    (reverse FK) diz como carregar a relação sem N+1; `to_attr`/`queryset`
+    vão para o Prefetch e `first=True` devolve só o primeiro item da lista.
+    """
+
+    def __init__(self, serializer, *, many=False, select_related=None, prefetch=None, queryset=None,
+                 to_attr=None, first=False):
+        self.serializer = serializer
+        self.many = many and not first
+        self.select_related = select_related
+        self.prefetch = prefetch
+        self.queryset = queryset
+        self.to_attr = to_attr
+        self.first = first
+
+    @property
+    def serializer_class(self):
+        if isinstance(self.serializer, str):
+            self.serializer = import_string(self.serializer)
+        return self.serializer
+
+    def get_queryset(self):
+        return self.queryset() if callable(self.queryset) else self.queryset
+
+    def resolve(self, instance):
+        try:
+            value = getattr(instance, self.to_attr or self.select_related or self.prefetch)
+        except ObjectDoesNotExist:
+            return None
+        if hasattr(value, "all"):
+            value = value.all()
+        if self.first:
+            return value[0] if value else None
+        return value
+
+
+def related_lookups(serializer_class, expand, prefix=""):
+    """select_related/Prefetch necessários para serializar `expand` sem queries por linha."""
+    selects, prefetches = [], []
+    for name, subtree in expand.items():
+        expansion = getattr(serializer_class, "expandable_fields", {}).get(name)
+        if expansion is None:
+            continue
+        child = expansion.serializer_class
+        if expansion.select_related:
+            path = prefix + expansion.select_related
+            selects.append(path)
+            child_selects, child_prefetches = related_lookups(child, subtree, path + "__")
+            selects += child_selects
+            prefetches += child_prefetches
+        else:
+            queryset = expansion.get_queryset()
+            if queryset is not None:
+                queryset = expand_queryset(queryset, child, subtree)
+            prefetches.append(Prefetch(prefix + expansion.prefetch, queryset=queryset, to_attr=expansion.to_attr))
+    return selects, prefetches
+
+
+def expand_queryset(queryset, serializer_class, expand=None, fields=None):
+    """Aplica os joins/prefetches das expansões e adia colunas grandes fora de `?fields=`."""
+    selects, prefetches = related_lookups(serializer_class, expand or {})
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if fields:
+        deferred = [name for name in getattr(serializer_class, "deferrable_fields", ()) if name not in fields]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+    return queryset
+
+
+class ExpandableFieldsMixin:
+    """
+    Serializer com `?expand=` (relações em `expandable_fields`) e `?fields=`
+    (subconjunto de campos), ambos aninháveis com ponto:
+    `?expand=dogs,dogs.health&fields=id,name,dogs.name`.
+    """
+    expandable_fields = {}
+    deferrable_fields = ()  # colunas grandes que o queryset adia quando ficam fora de ?fields=
+
+    def __init__(self, *args, expand=None, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._expand = {name: tree for name, tree in (expand or {}).items() if name in self.expandable_fields}
+        self._fields = fields or {}
+        if self._fields:
+            for name in list(self.fields):
+                if name not in self._fields and name not in self._expand:
+                    self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name, tree in self._expand.items():
+            expansion = self.expandable_fields[name]
+            value = expansion.resolve(instance)
+            if value is None:
+                data[name] = None
+                continue
+            data[name] = expansion.serializer_class(
+                value, many=expansion.many, context=self.context, expand=tree, fields=self._fields.get(name),
+            ).data
+        return data
+
+
+class ExpandableViewMixin:
+    """Lê `?expand=`/`?fields=` e prepara queryset e serializer de acordo."""
+
+    def get_expand(self):
+        return parse_tree(self.request.query_params.get("expand"))
+
+    def get_fields(self):
+        # só em leituras: num POST/PUT/PATCH o recorte tiraria campos da validação e da gravação
+        if self.request.method not in SAFE_METHODS:
+            return {}
+        return parse_tree(self.request.query_params.get("fields"))
+
+    def is_expandable(self, serializer_class):
+        return issubclass(serializer_class, ExpandableFieldsMixin)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if self.is_expandable(serializer_class):
+            queryset = expand_queryset(queryset, serializer_class, self.get_expand(), self.get_fields())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_expandable(self.get_serializer_class()):
+            kwargs.setdefault("expand", self.get_expand())
+            kwargs.setdefault("fields", self.get_fields())
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,50 @@
+import datetime
+
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary
+from django.db.models import DateTimeField, Field, Func, TextField, Value
+from django.db.models.functions import Coalesce, Lower
+
+# check_in nulo na timeline: o menor instante possível, para ir ao fim na ordem DESC
+NULL_TIMESTAMP = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+
+
+class ImmutableUnaccent(Func):
+    """
+    `dogdex_unaccent(text)`: wrapper IMMUTABLE de unaccent() criado na
+    migração 0006, para poder ser usado em índices de expressão.
+    """
+    function = "dogdex_unaccent"
+    output_field = TextField()
+
+
+def search_normalized(expression):
+    """Texto minúsculo e sem acentos, igual à expressão dos índices trigram."""
+    return ImmutableUnaccent(Lower(expression))
+
+
+def normalized_value(text):
+    return search_normalized(Value(text))
+
+
+class TsTzRange(Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+def stay_period(check_in="check_in", check_out="check_out"):
+    """`tstzrange(check_in, check_out, '[)')`; check_out nulo = ainda hospedado. Mesma expressão do índice GiST."""
+    return TsTzRange(check_in, check_out, RangeBoundary())
+
+
+def stay_timestamp(check_in="check_in"):
+    """`COALESCE(check_in, NULL_TIMESTAMP)`: posição da hospedagem na timeline. Mesma expressão do índice."""
+    return Coalesce(check_in, Value(NULL_TIMESTAMP, output_field=DateTimeField()))
+
+
+class Row(Func):
+    """
+    `ROW(a, b, ...)`: comparar tuplas inteiras (`ROW(a, b) < ROW(x, y)`) vira
+    uma única condição de limite no B-tree de (a, b), em vez de ORs por coluna.
+    """
+    function = "ROW"
+    output_field = Field()
@@ -0,0 +1,40 @@
+"""
+UUIDv7 (RFC 9562): 48 bits de timestamp em ms seguidos de bits aleatórios.
+Ids novos crescem com o tempo, então os inserts caem no fim do índice da PK
+em vez de espalhar por todo o B-tree como o uuid4. Ids v4 antigos continuam
+válidos (mesmo tipo de coluna).
+"""
+import os
+import threading
+import time
+import uuid
+
+RANDOM_BITS = 74  # rand_a (12) + rand_b (62)
+
+_lock = threading.Lock()
+_last = (0, 0)
+
+
+def uuid7():
+    """
+    Gera um UUIDv7. Dentro do mesmo ms (ou se o relógio voltar) incrementa a
+    parte aleatória do último id, então os ids do processo são estritamente
+    crescentes.
+    """
+    global _last
+    timestamp = time.time_ns() // 1_000_000
+    random = int.from_bytes(os.urandom(10), "big") >> (80 - RANDOM_BITS)
+    with _lock:
+        if (timestamp, random) <= _last:
+            timestamp, random = _last[0], _last[1] + 1
+            if random >> RANDOM_BITS:
+                timestamp, random = timestamp + 1, 0
+        _last = (timestamp, random)
+    return uuid.UUID(int=(
+        timestamp << 80 | 0x7 << 76 | (random >> 62) << 64 | 0b10 << 62 | (random & ((1 << 62) - 1))
+    ))
+
+
+def timestamp_of(value):
+    """Momento (segundos epoch) embutido num UUIDv7; None para outras versões."""
+    return (value.int >> 80) / 1000 if value.version == 7 else None
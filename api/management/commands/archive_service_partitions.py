@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import billing, partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Arquiva as partições mensais de ServiceRecord anteriores a --before: desanexa a partição "
+        "(os serviços somem da API e do timeline) e, com --dump-dir, grava a tabela desanexada num .csv.gz. "
+        "Os totais continuam no BillingRollup, mas `rebuild_billing` desses meses os perderia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="Arquiva os meses anteriores a este (YYYY-MM).")
+        parser.add_argument("--dump-dir", help="Diretório onde gravar <partição>.csv.gz.")
+        parser.add_argument("--drop", action="store_true", help="Apaga a tabela depois de desanexar.")
+        parser.add_argument("--dry-run", action="store_true", help="Só lista as partições que seriam arquivadas.")
+
+    def handle(self, *args, **options):
+        try:
+            before = billing.parse_month(options["before"])
+        except ValueError:
+            raise CommandError("Use o formato YYYY-MM em --before.")
+        if options["drop"] and not options["dump_dir"] and not options["dry_run"]:
+            raise CommandError("--drop sem --dump-dir apagaria os dados sem cópia.")
+
+        months = [month for month in partitions.monthly_partitions() if month < before]
+        for month in months:
+            name = partitions.partition_name(month)
+            if options["dry_run"]:
+                self.stdout.write(f"Arquivaria {name}")
+                continue
+            path = partitions.archive(month, options["dump_dir"], options["drop"])
+            self.stdout.write(f"Arquivada {name}" + (f" em {path}" if path else ""))
+        self.stdout.write(self.style.SUCCESS(f"{len(months)} partição(ões) {'a arquivar' if options['dry_run'] else 'arquivada(s)'}."))
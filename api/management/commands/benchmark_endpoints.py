@@ -0,0 +1,289 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from api import billing, profiling, urls
+from api.models import Dog, Health, ImportJob, Owner, ServiceRecord, ServiceType, Stay
+
+# (nome da rota, método, path com {amostras}, orçamento de queries)
+# os orçamentos incluem sessão + usuário (2 queries) e não dependem do volume: passar deles é N+1
+ENDPOINTS = [
+    ("api-root", "GET", "/api/", 2),
+    ("user-list", "GET", "/api/users/", 4),
+    ("user-detail", "GET", "/api/users/{user}/", 4),
+    ("group-list", "GET", "/api/groups/", 4),
+    ("group-detail", "GET", "/api/groups/{group}/", 4),
+    ("dog-list", "GET", "/api/dogs/?ids={dog_ids}", 5),
+    ("dog-detail", "GET", "/api/dogs/{dog}/", 4),
+    ("dog-detail", "GET", "/api/dogs/{dog}/?expand=owner,health,last_stay", 6),
+    ("dog-timeline", "GET", "/api/dogs/{dog}/timeline/", 5),
+    ("owner-list", "GET", "/api/owners/?ids={owner_ids}", 5),
+    ("owner-detail", "GET", "/api/owners/{owner}/", 4),
+    ("owner-detail", "GET", "/api/owners/{owner}/?expand=dogs,dogs.health", 5),
+    ("owner-lookup", "GET", "/api/owners/lookup/?cpf={cpf}", 4),
+    ("owner-billing", "GET", "/api/owners/{owner}/billing/?month={month}", 5),
+    ("health-list", "GET", "/api/healths/?ids={health_ids}", 4),
+    ("health-detail", "GET", "/api/healths/{health}/", 3),
+    ("service-type-list", "GET", "/api/service-types/", 3),
+    ("service-type-detail", "GET", "/api/service-types/{service_type}/", 3),
+    ("stay-list", "GET", "/api/stays/", 3),
+    ("stay-list", "GET", "/api/stays/?dog={dog}", 4),
+    ("stay-detail", "GET", "/api/stays/{stay}/", 3),
+    ("stay-export", "GET", "/api/stays/export/?dog={dog}&format=csv", 4),
+    ("stay-occupancy", "GET", "/api/stays/occupancy/", 3),
+    ("service-record-list", "GET", "/api/services/", 3),
+    ("service-record-list", "GET", "/api/services/?dog={dog}", 4),
+    ("service-record-list", "GET", "/api/services/?ids={service_ids}", 3),
+    ("service-record-detail", "GET", "/api/services/{service}/", 3),
+    ("service-record-export", "GET", "/api/services/export/?dog={dog}&format=ndjson", 4),
+    ("service-record-bulk", "POST", "/api/services/bulk/", 10),
+    ("owner-onboarding", "POST", "/api/onboarding/", 8),
+    ("onboarding-import", "POST", "/api/onboarding/import/", 20),
+    ("onboarding-import-detail", "GET", "/api/onboarding/import/{job}/", 3),
+    ("billing", "GET", "/api/billing/?month={month}", 3),
+    ("search", "GET", "/api/search/?q=rex", 5),
+    ("sync", "GET", "/api/sync/", 10),
+    ("cache-stats", "GET", "/api/cache/stats/", 2),
+    ("profile-list", "GET", "/api/profiles/", 2),
+    ("profile-download", "GET", "/api/profiles/{profile}/", 2),
+    ("async-dog-detail", "GET", "/api/async/dogs/{dog}/", 3),
+    ("async-dog-timeline", "GET", "/api/async/dogs/{dog}/timeline/", 3),
+    ("async-owner-detail", "GET", "/api/async/owners/{owner}/", 3),
+    ("async-stay-list", "GET", "/api/async/stays/", 3),
+    ("async-service-list", "GET", "/api/async/services/", 3),
+]
+# rotas fora da suíte: stream sem fim e as telas de login do DRF
+SKIPPED = {"live-events", "login", "logout"}
+BATCH_IDS = 100
+BULK_RECORDS = 50
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class QueryCounter:
+    """
+    execute_wrapper que conta as queries de todas as conexões: as views async
+    rodam o ORM em outro contexto, com conexão própria, e o
+    CaptureQueriesContext só veria a da thread principal.
+    """
+
+    def __init__(self):
+        self.count = None  # None: fora de uma medição
+
+    def __call__(self, execute, sql, params, many, context):
+        # os savepoints do rollback dos POSTs não contam
+        if self.count is not None and not sql.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def attach(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def consume(response):
+    """Lê o corpo inteiro, inclusive de respostas em stream (exports)."""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda cada rota de api/urls.py contra a base atual (ex.: a do seed_dataset) com o Client do Django e "
+        "mede p50/p95, queries e pico de memória. Falha se uma rota passar do orçamento de queries ou ficar "
+        "mais lenta que o baseline salvo (--baseline) além de --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Medições por rota (após 2 de aquecimento).")
+        parser.add_argument("--only", action="append", default=[], help="Só as rotas com este nome (repetível).")
+        parser.add_argument("--user", help="Usuário staff usado nas requisições (padrão: o primeiro superusuário).")
+        parser.add_argument("--baseline", help="JSON com os resultados de referência.")
+        parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados em --baseline.")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Regressão tolerada no p50 (0.25 = 25%%).")
+        parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                            help="Diferença mínima em ms para contar como regressão (ruído em rotas rápidas).")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations deve ser positivo.")
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requer --baseline.")
+        missing = set(route_names(urls.urlpatterns)) - {name for name, *_ in ENDPOINTS} - SKIPPED
+        if missing:
+            raise CommandError(f"Rotas sem benchmark nem SKIPPED: {', '.join(sorted(missing))}.")
+
+        users = get_user_model().objects.filter(is_superuser=True, is_active=True)
+        user = (users.filter(username=options["user"]) if options["user"] else users.order_by("pk")).first()
+        if user is None:
+            raise CommandError("Nenhum superusuário encontrado (crie com createsuperuser ou informe --user).")
+        samples = self.samples(user)
+        baseline = {}
+        if options["baseline"] and Path(options["baseline"]).exists() and not options["save_baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+
+        client = Client()
+        client.force_login(user)
+        self.counter = QueryCounter()
+        self.counter.attach(None, connection)
+        connection_created.connect(self.counter.attach)
+        results, failures = {}, []
+        with override_settings(ALLOWED_HOSTS=["testserver"], DOGDEX_RESPONSE_CACHE={"ENABLED": False}):
+            for name, method, template, budget in ENDPOINTS:
+                if options["only"] and name not in options["only"]:
+                    continue
+                label = f"{method} {template}"
+                try:
+                    path = template.format(**samples)
+                except KeyError as exc:
+                    self.stdout.write(f"{label}: sem dados para {exc}, pulada")
+                    continue
+                result = self.measure(client, method, path, samples, options["iterations"])
+                results[label] = result
+                failures += self.verdict(label, result, budget, baseline.get(label), options)
+                self.stdout.write(
+                    f"{label}: {result['status']} p50 {result['p50_ms']:.1f}ms p95 {result['p95_ms']:.1f}ms "
+                    f"{result['queries']} queries (máx. {budget}) pico {result['peak_kib']:.0f} KiB "
+                    f"{result['bytes']} bytes"
+                )
+
+        if options["save_baseline"]:
+            Path(options["baseline"]).write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Baseline gravado em {options['baseline']}."))
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} rota(s) dentro dos orçamentos."))
+
+    def samples(self, user):
+        """Ids reais para preencher os paths; usa o cão com mais serviços (pior caso da timeline)."""
+        samples = {"user": user.pk, "month": billing.month_of(timezone.now()).strftime("%Y-%m")}
+        top = (ServiceRecord.objects.values("dog").annotate(total=Count("id")).order_by("-total").first())
+        dog = Dog.objects.select_related("owner").filter(pk=top["dog"]).first() if top else Dog.objects.first()
+        if dog is not None:
+            samples.update(dog=dog.pk, owner=dog.owner_id)
+            if dog.owner.cpf:
+                samples["cpf"] = dog.owner.cpf
+        lookups = {
+            "group": Group.objects.values_list("pk", flat=True),
+            "health": Health.objects.filter(dog=dog).values_list("pk", flat=True),
+            "stay": Stay.objects.filter(dog=dog).order_by("-check_in").values_list("pk", flat=True),
+            "service": ServiceRecord.objects.filter(dog=dog).order_by("-created_at").values_list("pk", flat=True),
+            "service_type": ServiceType.objects.filter(base_price__isnull=False).values_list("pk", flat=True),
+            "job": ImportJob.objects.order_by("-created_at").values_list("pk", flat=True),
+        }
+        for key, queryset in lookups.items():
+            pk = queryset.first()
+            if pk is not None:
+                samples[key] = pk
+        stored = profiling.profiles()
+        if stored:
+            samples["profile"] = stored[0]["name"]
+        batches = {"dog_ids": Dog, "owner_ids": Owner, "health_ids": Health, "service_ids": ServiceRecord}
+        for key, model in batches.items():
+            ids = model.objects.order_by("pk").values_list("pk", flat=True)[:BATCH_IDS]
+            if ids:
+                samples[key] = ",".join(str(pk) for pk in ids)
+        return samples
+
+    def payload(self, path, samples):
+        """Corpo dos POSTs; None quando faltam dados para montá-lo."""
+        if path.startswith("/api/services/bulk/"):
+            if "dog" not in samples or "service_type" not in samples:
+                return None
+            today = timezone.localdate()
+            records = [{"dog": str(samples["dog"]), "service_type": str(samples["service_type"]),
+                        "day": str(today.replace(day=1) if i % 2 else today), "notes": f"benchmark {i}"}
+                       for i in range(BULK_RECORDS)]
+            return {"data": {"records": records}, "content_type": "application/json"}
+        if path.startswith("/api/onboarding/import/"):
+            lines = ["name,phone,dog_name,dog_size,dog_gender,health_castrated"]
+            lines += [f"Tutor Benchmark {i},(11) 90000-{i:04d},Cão {i},PEQUENO,M,sim" for i in range(BULK_RECORDS)]
+            upload = SimpleUploadedFile("benchmark.csv", "\n".join(lines).encode(), content_type="text/csv")
+            return {"data": {"file": upload}}
+        if path.startswith("/api/onboarding/"):
+            dogs = [{"name": f"Cão {i}", "size": Dog.Size.values[i % 3], "gender": "M", "health": {"castrated": True}}
+                    for i in range(3)]
+            return {"data": {"name": "Tutor Benchmark", "phone": "(11) 90000-0000", "dogs": dogs},
+                    "content_type": "application/json"}
+        return {}
+
+    def request(self, client, method, path, samples):
+        if method == "GET":
+            response = client.get(path, HTTP_ACCEPT="*/*")  # o formato sai do ?format= ou do renderer padrão
+            return response, consume(response)
+        payload = self.payload(path, samples)
+        if isinstance(payload.get("data"), dict) and "file" in payload["data"]:
+            payload["data"]["file"].seek(0)
+        # escrita desfeita no fim: a base não muda entre as medições
+        with transaction.atomic():
+            response = client.post(path, **payload)
+            size = consume(response)
+            transaction.set_rollback(True)
+        return response, size
+
+    def measure(self, client, method, path, samples, iterations):
+        if method == "POST" and self.payload(path, samples) is None:
+            return {"status": "sem dados", "p50_ms": 0.0, "p95_ms": 0.0, "queries": 0, "peak_kib": 0.0, "bytes": 0}
+        for _ in range(2):
+            self.request(client, method, path, samples)
+
+        tracemalloc.start()
+        response, size = self.request(client, method, path, samples)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        timings, queries = [], 0
+        for _ in range(iterations):
+            self.counter.count = 0
+            start = time.perf_counter()
+            response, size = self.request(client, method, path, samples)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries, self.counter.count = max(queries, self.counter.count), None
+        return {
+            "status": response.status_code,
+            "p50_ms": statistics.median(timings),
+            "p95_ms": percentile(timings, 0.95),
+            "queries": queries,
+            "peak_kib": peak / 1024,
+            "bytes": size,
+        }
+
+    def verdict(self, label, result, budget, reference, options):
+        if not isinstance(result["status"], int):
+            return []
+        failures = []
+        if result["status"] >= 400:
+            failures.append(f"{label}: status {result['status']}.")
+        if result["queries"] > budget:
+            failures.append(f"{label}: {result['queries']} queries, orçamento {budget}.")
+        if reference:
+            slower = result["p50_ms"] - reference["p50_ms"]
+            if slower > options["min_delta_ms"] and result["p50_ms"] > reference["p50_ms"] * (1 + options["threshold"]):
+                failures.append(f"{label}: p50 {result['p50_ms']:.1f}ms, baseline {reference['p50_ms']:.1f}ms.")
+            if result["queries"] > reference["queries"]:
+                failures.append(f"{label}: {result['queries']} queries, baseline {reference['queries']}.")
+        return failures
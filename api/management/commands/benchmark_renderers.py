@@ -0,0 +1,72 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import ServiceRecordSerializer, StaySerializer
+from api.views import ServiceRecordViewSet, StayViewSet
+
+
+def timed(function, iterations):
+    """Mediana em ms de `iterations` chamadas."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o FastJSONRenderer/FastJSONParser (orjson) com o JSONRenderer/JSONParser do DRF nas páginas "
+        "de serviços e hospedagens; falha se a saída não for idêntica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Linhas por payload.")
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None or parsers.orjson is None:
+            raise CommandError("O pacote orjson não está instalado; os Fast* usam a implementação do DRF.")
+        if min(options["rows"], options["iterations"]) < 1:
+            raise CommandError("--rows e --iterations devem ser positivos.")
+        rows = options["rows"]
+        payloads = {
+            "serviços": ServiceRecordSerializer(
+                ServiceRecordViewSet.queryset.order_by("-created_at")[:rows], many=True).data,
+            "hospedagens": StaySerializer(StayViewSet.queryset.order_by("-check_in")[:rows], many=True).data,
+        }
+        for name, results in payloads.items():
+            if not results:
+                self.stdout.write(f"{name}: sem dados, pulado")
+                continue
+            # mesmo formato das páginas do CursorPagination
+            data = {"next": None, "previous": None, "results": results}
+            expected = JSONRenderer().render(data)
+            rendered = FastJSONRenderer().render(data)
+            if rendered != expected:
+                raise CommandError(f"{name}: saída do FastJSONRenderer difere da do JSONRenderer.")
+            if FastJSONParser().parse(io.BytesIO(expected)) != JSONParser().parse(io.BytesIO(expected)):
+                raise CommandError(f"{name}: FastJSONParser difere do JSONParser.")
+
+            iterations = options["iterations"]
+            drf_render = timed(lambda: JSONRenderer().render(data), iterations)
+            fast_render = timed(lambda: FastJSONRenderer().render(data), iterations)
+            drf_parse = timed(lambda: JSONParser().parse(io.BytesIO(expected)), iterations)
+            fast_parse = timed(lambda: FastJSONParser().parse(io.BytesIO(expected)), iterations)
+            megabytes = len(expected) / 1024 / 1024
+            self.stdout.write(
+                f"{name}: {len(results)} linhas, {len(expected) / 1024:.0f} KiB (saídas idênticas)\n"
+                f"  render: DRF {drf_render:.2f}ms ({megabytes / drf_render * 1000:.0f} MiB/s), "
+                f"orjson {fast_render:.2f}ms ({megabytes / fast_render * 1000:.0f} MiB/s), "
+                f"{drf_render / fast_render:.1f}x\n"
+                f"  parse:  DRF {drf_parse:.2f}ms, orjson {fast_parse:.2f}ms, {drf_parse / fast_parse:.1f}x"
+            )
@@ -0,0 +1,63 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.ids import uuid7
+
+# colunas no formato de api_servicerecord, o suficiente para o peso da linha
+CREATE_TABLE = """
+CREATE TEMP TABLE {name} (
+    id uuid PRIMARY KEY,
+    dog_id uuid NOT NULL,
+    performed_at timestamptz,
+    price numeric(10, 2),
+    notes text,
+    created_at timestamptz NOT NULL
+)
+"""
+INSERT = """
+INSERT INTO {name} (id, dog_id, performed_at, price, notes, created_at)
+SELECT id, %s, %s, 50.00, NULL, now() FROM unnest(%s::uuid[]) AS id
+"""
+GENERATORS = {"v4": uuid.uuid4, "v7": uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara uuid4 x uuid7 como PK: semeia uma tabela temporária no formato de ServiceRecord, "
+        "mede os inserts seguintes e o tamanho do índice da PK. Nada é gravado no banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=200_000, help="Linhas semeadas antes da medição.")
+        parser.add_argument("--rows", type=int, default=100_000, help="Linhas inseridas na medição.")
+        parser.add_argument("--batch", type=int, default=1000, help="Linhas por INSERT.")
+
+    def handle(self, *args, **options):
+        if options["seed"] < 0 or options["rows"] < 1 or options["batch"] < 1:
+            raise CommandError("--seed não pode ser negativo; --rows e --batch devem ser positivos.")
+        for version, generate in GENERATORS.items():
+            with transaction.atomic(), connection.cursor() as cursor:
+                name = f"dogdex_uuid_{version}"
+                cursor.execute(CREATE_TABLE.format(name=name))
+                self.insert(cursor, name, generate, options["seed"], options["batch"])
+                start = time.perf_counter()
+                self.insert(cursor, name, generate, options["rows"], options["batch"])
+                elapsed = time.perf_counter() - start
+                cursor.execute("SELECT pg_relation_size(%s), pg_relation_size(%s)", [f"{name}_pkey", name])
+                index_size, table_size = cursor.fetchone()
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{version}: {options['rows'] / elapsed:,.0f} inserts/s ({elapsed:.2f}s), "
+                f"índice PK {index_size / 2 ** 20:.1f} MiB, tabela {table_size / 2 ** 20:.1f} MiB"
+            )
+
+    def insert(self, cursor, name, generate, rows, batch):
+        sql = INSERT.format(name=name)
+        dog_id, now = uuid.uuid4(), timezone.now()
+        for offset in range(0, rows, batch):
+            ids = [generate() for _ in range(min(batch, rows - offset))]
+            cursor.execute(sql, [dog_id, now, ids])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import billing, partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria as partições mensais de ServiceRecord que faltam (rodar por cron, ex.: todo dia 1º). "
+        "Serviços de meses sem partição caem na partição DEFAULT e são movidos quando ela é criada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", help="Primeiro mês (YYYY-MM); padrão = mês atual.")
+        parser.add_argument("--months", type=int, default=3, help="Quantos meses à frente garantir.")
+
+    def handle(self, *args, **options):
+        if options["months"] < 0:
+            raise CommandError("--months não pode ser negativo.")
+        try:
+            start = billing.parse_month(options["start"]) if options["start"] else timezone.localdate()
+        except ValueError:
+            raise CommandError("Use o formato YYYY-MM em --from.")
+        created = partitions.ensure(start, options["months"])
+        for name in created:
+            self.stdout.write(f"Criada {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partição(ões) criada(s)."))
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o schema OpenAPI em DOGDEX_SCHEMA['FILE'] (servido em /openapi.json). Rode no build/deploy, "
+        "antes de subir os workers; sem o arquivo cada processo gera o schema na primeira requisição. "
+        "O arquivo é artefato do build e fica fora do git (.gitignore)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Arquivo de saída (padrão: DOGDEX_SCHEMA['FILE']).")
+
+    def handle(self, *args, **options):
+        path = Path(options["output"] or schema.schema_settings()["FILE"])
+        content = schema.generate()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.tmp")
+        temporary.write_bytes(content)
+        temporary.replace(path)  # workers lendo nunca veem o arquivo pela metade
+        self.stdout.write(self.style.SUCCESS(f"Schema gravado em {path} ({len(content)} bytes)."))
@@ -0,0 +1,46 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import onboarding
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa cadastros (tutor + cão + saúde) de uma planilha CSV/XLSX, como POST /api/onboarding/import/. "
+        "Rodar de novo com o mesmo arquivo retoma do último bloco gravado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .csv (UTF-8, separado por vírgula ou ;) ou .xlsx.")
+        parser.add_argument("--chunk-size", type=int, default=onboarding.CHUNK_SIZE, help="Linhas por transação.")
+        parser.add_argument("--restart", action="store_true", help="Ignora importações anteriores do arquivo.")
+        parser.add_argument("--errors-csv", help="Grava o relatório de erros (linha, erros) neste CSV.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size deve ser positivo.")
+        try:
+            with open(options["path"], "rb") as file:
+                content = file.read()
+            job = onboarding.import_file(options["path"], content, options["chunk_size"], options["restart"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except onboarding.ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        if options["errors_csv"]:
+            with open(options["errors_csv"], "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(["row", "errors"])
+                for error in job.errors:
+                    writer.writerow([error["row"], json.dumps(error["errors"], ensure_ascii=False)])
+        self.stdout.write(
+            f"Importação {job.id}: {job.processed_rows}/{job.total_rows} linha(s), "
+            f"{job.created_owners} tutor(es) novo(s), {job.reused_owners} reaproveitado(s) por CPF, "
+            f"{job.created_dogs} cão(es), {len(job.errors)} linha(s) com erro."
+        )
+        if job.status != job.Status.DONE:
+            raise CommandError(f"Importação interrompida: {job.message} Rode de novo para retomar.")
+        self.stdout.write(self.style.SUCCESS("Importação concluída."))
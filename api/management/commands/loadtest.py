@@ -0,0 +1,110 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def read_response(reader):
+    """Lê uma resposta HTTP/1.1 (Content-Length ou chunked); devolve (status, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip().lower()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection") != "close"
+
+
+async def worker(url, queue, latencies, errors):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    request = f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n\r\n".encode()
+    reader = writer = None
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(None)
+            writer = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, requests, concurrency):
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(url, queue, latencies, errors) for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga HTTP concorrente contra um servidor já rodando, para comparar o caminho WSGI "
+        "com o async. Ex.: suba `gunicorn Dogdex.wsgi -w 1 --threads 8` e depois "
+        "`uvicorn Dogdex.asgi:application --workers 1` e rode "
+        "`loadtest /api/dogs/<id>/timeline/ /api/async/dogs/<id>/timeline/`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Paths (ou URLs completas) a testar, um de cada vez.")
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Servidor alvo.")
+        parser.add_argument("--requests", type=int, default=1000, help="Requisições por path.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Conexões simultâneas.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests e --concurrency devem ser positivos.")
+        for path in options["paths"]:
+            url = path if "://" in path else options["base_url"].rstrip("/") + path
+            if urlsplit(url).scheme != "http":
+                raise CommandError("Só http:// é suportado.")
+            elapsed, latencies, errors = asyncio.run(run(url, options["requests"], options["concurrency"]))
+            latencies.sort()
+            self.stdout.write(
+                f"{url}\n"
+                f"  {len(latencies)} ok em {elapsed:.2f}s = {len(latencies) / elapsed:.1f} req/s, "
+                f"{len(errors)} erro(s)\n"
+                f"  latência ms: média {statistics.fmean(latencies or [0]) * 1000:.1f} "
+                f"p50 {percentile(latencies, 0.50) * 1000:.1f} "
+                f"p95 {percentile(latencies, 0.95) * 1000:.1f} "
+                f"p99 {percentile(latencies, 0.99) * 1000:.1f}"
+            )
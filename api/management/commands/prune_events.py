@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import LiveEvent
+
+
+class Command(BaseCommand):
+    help = "Apaga LiveEvents antigos (clientes desconectados há mais tempo que isso recarregam as listas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Mantém os eventos dos últimos N dias.")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days deve ser positivo.")
+        cutoff = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted, _ = LiveEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} evento(s) anterior(es) a {cutoff:%Y-%m-%d %H:%M} apagado(s)."))
@@ -0,0 +1,25 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import sync
+from api.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga Tombstones mais antigos que DOGDEX_SYNC['TOMBSTONE_DAYS'] (tablets com token "
+        "mais velho que isso já recebem 410 e refazem a sincronização completa)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Retenção em dias; padrão = TOMBSTONE_DAYS.")
+
+    def handle(self, *args, **options):
+        days = options["days"] or sync.sync_settings()["TOMBSTONE_DAYS"]
+        if days < 1:
+            raise CommandError("--days deve ser positivo.")
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} remoção(ões) anterior(es) a {cutoff:%Y-%m-%d %H:%M} apagada(s)."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import billing
+
+
+class Command(BaseCommand):
+    help = "Recalcula o BillingRollup de um intervalo de meses a partir de Stay e ServiceRecord."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", required=True, help="Primeiro mês (YYYY-MM).")
+        parser.add_argument("--to", dest="end", help="Último mês (YYYY-MM); padrão = --from.")
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Só compara o rollup com os dados brutos, sem gravar; sai com erro se divergir.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = billing.parse_month(options["start"])
+            end = billing.parse_month(options["end"] or options["start"])
+        except ValueError:
+            raise CommandError("Use o formato YYYY-MM em --from/--to.")
+        if end < start:
+            raise CommandError("--to não pode ser anterior a --from.")
+
+        if options["check"]:
+            differences = billing.differences(start, end)
+            for (owner_id, month, service_type_id, currency), (stored, expected) in sorted(
+                differences.items(), key=lambda item: str(item[0])
+            ):
+                self.stdout.write(
+                    f"{month:%Y-%m} owner={owner_id} service_type={service_type_id or '-'} {currency}: "
+                    f"rollup={stored} bruto={expected}"
+                )
+            if differences:
+                raise CommandError(f"{len(differences)} divergência(s) entre o rollup e os dados brutos.")
+            self.stdout.write(self.style.SUCCESS("Rollup confere com os dados brutos."))
+            return
+
+        rows = billing.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"{rows} linha(s) recalculada(s) de {start:%Y-%m} a {end:%Y-%m}."))
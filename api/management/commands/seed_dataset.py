@@ -0,0 +1,224 @@
+import csv
+import datetime
+import io
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import billing, partitions
+from api import cache as response_cache
+from api.ids import uuid7
+from api.models import Dog, Health, Owner, ServiceRecord, ServiceType, Stay, occurred_at_of
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+               "Juliana", "Lucas", "Mariana", "Nicolas", "Patrícia", "Rafael", "Sofia", "Thiago", "Vitória", "Yuri"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Araújo", "Melo", "Barbosa", "Rocha", "Dias", "Nunes"]
+DISTRICTS = ["Centro", "Jardim América", "Vila Nova", "Boa Vista", "Santa Cruz", "Bela Vista", "Liberdade", "Pinheiros"]
+DOG_NAMES = ["Rex", "Thor", "Mel", "Luna", "Bob", "Nina", "Pipoca", "Fred", "Amora", "Zeus", "Belinha", "Toby",
+             "Mia", "Bolt", "Lola", "Max", "Paçoca", "Jade", "Simba", "Chico"]
+BREEDS = ["SRD", "SRD", "SRD", "Shih Tzu", "Poodle", "Labrador", "Golden Retriever", "Yorkshire", "Pinscher",
+          "Bulldog Francês", "Border Collie", "Lhasa Apso", "Spitz Alemão", "Beagle"]
+SERVICE_TYPES = {"Banho": "60.00", "Tosa": "90.00", "Creche": "70.00", "Transporte": "35.00",
+                 "Adestramento": "120.00", "Hidratação": "45.00"}
+DAILY_RATES = {Dog.Size.PEQUENO: Decimal("90.00"), Dog.Size.MEDIO: Decimal("110.00"), Dog.Size.GRANDE: Decimal("140.00")}
+STAY_SERVICE_SHARE = 0.2  # parte dos serviços feita durante hospedagens
+SERVICE_COLUMNS = ("id", "dog", "owner", "service_type", "stay", "performed_at", "day", "price", "currency",
+                   "metadata", "created_at", "updated_at", "event_date", "occurred_at")
+SERVICE_PRICE = SERVICE_COLUMNS.index("price")
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera uma base sintética realista para benchmarks (ex.: --owners 50000 --dogs 80000 --stays 500000 "
+        "--services 5000000), com bulk_create e COPY para os serviços. Mantém services_total, partições e "
+        "BillingRollup consistentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owners", type=int, default=5000)
+        parser.add_argument("--dogs", type=int, default=8000)
+        parser.add_argument("--stays", type=int, default=50000)
+        parser.add_argument("--services", type=int, default=500000)
+        parser.add_argument("--months", type=int, default=24, help="Histórico gerado, em meses até hoje.")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (mesma semente, mesma base).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Linhas por INSERT.")
+
+    def handle(self, *args, **options):
+        if min(options["owners"], options["months"], options["batch_size"]) < 1:
+            raise CommandError("--owners, --months e --batch-size devem ser positivos.")
+        if options["dogs"] < options["owners"]:
+            raise CommandError("--dogs deve ser pelo menos --owners (todo tutor tem um cão).")
+        if min(options["stays"], options["services"]) < 0:
+            raise CommandError("--stays e --services não podem ser negativos.")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        # no fuso local, para a data do serviço (event_date/day) sair direto de .date()
+        self.end = timezone.localtime(self.now).replace(minute=0, second=0, microsecond=0)
+        self.start = self.end - datetime.timedelta(days=30 * options["months"])
+        self.service_types = self.ensure_service_types()
+
+        partitions.ensure(self.start.date(), options["months"] + 1)
+        owner_ids = self.timed("tutores", self.create_owners, options["owners"])
+        dogs = self.timed("cães e saúde", self.create_dogs, owner_ids, options["dogs"])
+        stay_services = int(options["services"] * STAY_SERVICE_SHARE) if options["stays"] else 0
+        self.timed("hospedagens", self.create_stays, dogs, options["stays"], stay_services)
+        self.timed("serviços avulsos", self.create_services, dogs, options["services"] - stay_services)
+        self.timed("faturamento", self.rebuild_billing)
+        with connection.cursor() as cursor:
+            for model in (Owner, Dog, Health, Stay, ServiceRecord):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        response_cache.invalidate(Owner, Dog, Health, Stay, ServiceRecord)
+
+    def timed(self, label, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(f"{label}: {time.perf_counter() - start:.1f}s")
+        return result
+
+    def insert(self, model, objects):
+        """bulk_create em transações de até 10 lotes."""
+        step = self.batch_size * 10
+        for offset in range(0, len(objects), step):
+            with transaction.atomic():
+                model.objects.bulk_create(objects[offset:offset + step], batch_size=self.batch_size)
+
+    def ensure_service_types(self):
+        for name, price in SERVICE_TYPES.items():
+            ServiceType.objects.get_or_create(name=name, defaults={"base_price": Decimal(price)})
+        return list(ServiceType.objects.filter(base_price__isnull=False))
+
+    def create_owners(self, count):
+        rng = self.rng
+        taken = set(Owner.objects.exclude(cpf_digits=None).values_list("cpf_digits", flat=True))
+        owners = []
+        while len(owners) < count:
+            cpf = f"{rng.randrange(10 ** 10, 10 ** 11):011d}"
+            if cpf in taken:
+                continue
+            taken.add(cpf)
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            owner = Owner(
+                name=f"{first} {last} {rng.choice(LAST_NAMES)}",
+                phone=f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(0, 9999):04d}",
+                email=f"{first.lower()}.{last.lower()}{len(owners)}@exemplo.com" if rng.random() < 0.7 else None,
+                cpf=f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}",
+                address=f"Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 2000)}",
+                district=rng.choice(DISTRICTS),
+            )
+            owner.fill_normalized()
+            owners.append(owner)
+        self.insert(Owner, owners)
+        return [owner.pk for owner in owners]
+
+    def create_dogs(self, owner_ids, count):
+        """Um cão por tutor e o resto sorteado; devolve [(dog_id, owner_id, size)]."""
+        rng = self.rng
+        owners = owner_ids + [rng.choice(owner_ids) for _ in range(count - len(owner_ids))]
+        dogs, healths = [], []
+        for owner_id in owners:
+            dog = Dog(
+                owner_id=owner_id,
+                name=rng.choice(DOG_NAMES),
+                age=rng.randint(0, 16),
+                gender=rng.choice(Dog.Gender.values),
+                size=rng.choice(Dog.Size.values),
+                breed=rng.choice(BREEDS),
+                is_active=rng.random() < 0.97,
+            )
+            dogs.append(dog)
+            chronic = rng.random() < 0.1
+            healths.append(Health(
+                dog=dog,
+                has_vet=rng.random() < 0.6,
+                castrated=rng.random() < 0.5,
+                chronic_disease=chronic,
+                disease_description="Dermatite" if chronic else None,
+                allergies="Frango" if rng.random() < 0.05 else None,
+            ))
+        self.insert(Dog, dogs)
+        self.insert(Health, healths)
+        return [(dog.pk, dog.owner_id, dog.size) for dog in dogs]
+
+    def service(self, dog_id, owner_id, when, stay_id=None):
+        """Linha de ServiceRecord na ordem de SERVICE_COLUMNS; `when` no fuso local, então event_date = when.date()."""
+        service_type = self.rng.choice(self.service_types)
+        if service_type.name == "Creche":
+            performed_at, day = None, when.date()
+        else:
+            performed_at, day = when, None
+        return (uuid7(), dog_id, owner_id, service_type.pk, stay_id, performed_at, day, service_type.base_price,
+                "BRL", "{}", self.now, self.now, when.date(), occurred_at_of(performed_at, day))
+
+    def random_moment(self, start, end):
+        seconds = max(int((end - start).total_seconds()), 1)
+        return start + datetime.timedelta(seconds=self.rng.randrange(seconds))
+
+    def create_stays(self, dogs, count, service_count):
+        """Hospedagens sem sobreposição por cão, com serviços dentro do período; services_total já somado."""
+        rng = self.rng
+        per_dog = {}
+        for _ in range(count):
+            dog = rng.choice(dogs)
+            per_dog[dog] = per_dog.get(dog, 0) + 1
+        services_per_stay = service_count / count if count else 0
+        stays, services = [], []
+        for (dog_id, owner_id, size), total in per_dog.items():
+            # check-ins sorteados e empurrados para depois do check-out anterior
+            moments = sorted(self.random_moment(self.start, self.end) for _ in range(total))
+            free_from = self.start
+            for check_in in moments:
+                check_in = max(check_in, free_from)
+                if check_in >= self.end:
+                    break  # histórico lotado para este cão
+                nights = rng.choices([1, 2, 3, 5, 7, 14], weights=[30, 25, 20, 12, 10, 3])[0]
+                check_out = check_in + datetime.timedelta(days=nights, hours=rng.randint(-3, 3))
+                free_from = check_out
+                # a que passa de agora fica em aberto (hóspede atual); é sempre a última do cão
+                stay = Stay(dog_id=dog_id, owner_id=owner_id, check_in=check_in,
+                            check_out=check_out if check_out <= self.end else None,
+                            price_total=DAILY_RATES[size] * nights)
+                for _ in range(int(services_per_stay) + (rng.random() < services_per_stay % 1)):
+                    row = self.service(dog_id, owner_id, self.random_moment(check_in, min(check_out, self.end)), stay.pk)
+                    stay.services_total += row[SERVICE_PRICE]
+                    services.append(row)
+                stays.append(stay)
+            if len(stays) + len(services) >= self.batch_size * 20:
+                self.flush_stays(stays, services)
+                stays, services = [], []
+        self.flush_stays(stays, services)
+
+    def flush_stays(self, stays, services):
+        with transaction.atomic():
+            Stay.objects.bulk_create(stays, batch_size=self.batch_size)
+            self.copy_services(services)
+
+    def create_services(self, dogs, count):
+        step = self.batch_size * 20
+        for offset in range(0, count, step):
+            rows = []
+            for _ in range(min(step, count - offset)):
+                dog_id, owner_id, _ = self.rng.choice(dogs)
+                rows.append(self.service(dog_id, owner_id, self.random_moment(self.start, self.end)))
+            with transaction.atomic():
+                self.copy_services(rows)
+
+    def copy_services(self, rows):
+        """COPY direto na tabela particionada: o volume de serviços não cabe no custo por objeto do bulk_create."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        columns = ", ".join(ServiceRecord._meta.get_field(name).column for name in SERVICE_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {ServiceRecord._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def rebuild_billing(self):
+        month, last = billing.month_of(self.start), billing.month_of(self.end)
+        while month <= last:
+            billing.rebuild(month, month)
+            month = partitions.next_month(month)
@@ -0,0 +1,300 @@
+"""
+Métricas por rota no formato de texto do Prometheus (`GET /metrics`).
+
+O MetricsMiddleware mede, por nome de rota (`dog-detail`, `billing`...) e
+método, a latência (histograma), as queries e o tempo no banco, o tempo de
+render da Response do DRF e o tamanho da resposta. Cada processo acumula em
+memória e grava um snapshot JSON em DOGDEX_METRICS["DIRECTORY"] no máximo a
+cada FLUSH_SECONDS; o /metrics soma os arquivos de todos os workers (limpe o
+diretório a cada deploy, como o PROMETHEUS_MULTIPROC_DIR).
+
+As queries são contadas por um execute_wrapper instalado em toda conexão
+(signal connection_created), que lê a requisição corrente de um ContextVar;
+assim entram também as das views async. Queries acima de SLOW_QUERY_MS vão
+para o log `api.metrics` com a rota e o plano do EXPLAIN.
+
+O middleware é sync e async: sob ASGI a requisição não passa por uma
+thread só para ser medida.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "DIRECTORY": None,  # padrão: <tmp>/dogdex-metrics
+    "FLUSH_SECONDS": 5,
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "SLOW_QUERY_MS": 500,
+    "EXPLAIN": True,
+    "TOKEN": None,  # /metrics aceita `Authorization: Bearer <TOKEN>` (Prometheus) ou usuário staff logado
+}
+EXCLUDED_ROUTES = {"metrics"}
+COUNTERS = (
+    ("queries", "dogdex_db_queries_total", "Queries SQL executadas."),
+    ("db_seconds", "dogdex_db_duration_seconds_total", "Tempo gasto no banco."),
+    ("render_seconds", "dogdex_render_duration_seconds_total", "Tempo de render (serialização) da resposta."),
+    ("bytes", "dogdex_response_size_bytes_total", "Bytes no corpo das respostas (sem as em stream)."),
+    ("slow_queries", "dogdex_db_slow_queries_total", "Queries acima de SLOW_QUERY_MS."),
+)
+
+_current = ContextVar("dogdex_metrics_request", default=None)
+_lock = threading.Lock()
+_state = {"pid": None}
+
+
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, "DOGDEX_METRICS", {})}
+
+
+def directory():
+    return Path(metrics_settings()["DIRECTORY"] or Path(tempfile.gettempdir()) / "dogdex-metrics")
+
+
+def state():
+    """Acumuladores deste processo; recomeça depois de um fork (workers do gunicorn com --preload)."""
+    if _state["pid"] != os.getpid():
+        _state.update(pid=os.getpid(), file=f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json",
+                      routes={}, statuses={}, flushed=0.0)
+    return _state
+
+
+class RequestStats:
+    __slots__ = ("request", "options", "queries", "db_seconds", "slow_queries", "render_started", "render_seconds")
+
+    def __init__(self, request, options):
+        self.request = request
+        self.options = options
+        self.queries = self.slow_queries = 0
+        self.db_seconds = self.render_seconds = 0.0
+        self.render_started = None
+
+
+def route_of(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match and match.view_name else "unmatched"
+
+
+def explain(connection, sql, params):
+    # savepoint: um EXPLAIN com erro não pode derrubar a transação da requisição
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"(EXPLAIN falhou: {exc})"
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: soma a query na requisição corrente e loga as lentas."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        options = stats.options
+        if elapsed * 1000 >= options["SLOW_QUERY_MS"]:
+            stats.slow_queries += 1
+            plan = None
+            if options["EXPLAIN"] and not many and sql.lstrip()[:6].upper() == "SELECT":
+                _current.set(None)  # o EXPLAIN não entra na contagem
+                try:
+                    plan = explain(context["connection"], sql, params)
+                finally:
+                    _current.set(stats)
+            logger.warning("Query lenta (%.0f ms) em %s: %s\n%s", elapsed * 1000, route_of(stats.request),
+                           sql, plan or "", extra={"route": route_of(stats.request), "duration_ms": elapsed * 1000})
+
+
+def instrument(connection):
+    if metrics_settings()["ENABLED"] and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def observe(route, method, status, seconds, stats, size):
+    options = stats.options
+    with _lock:
+        current = state()
+        key = (route, method)
+        data = current["routes"].get(key)
+        if data is None:
+            data = current["routes"][key] = {
+                "buckets": [0] * (len(options["BUCKETS"]) + 1), "count": 0, "sum": 0.0,
+                "queries": 0, "db_seconds": 0.0, "render_seconds": 0.0, "bytes": 0, "slow_queries": 0,
+            }
+        data["buckets"][bisect_left(options["BUCKETS"], seconds)] += 1
+        data["count"] += 1
+        data["sum"] += seconds
+        data["queries"] += stats.queries
+        data["db_seconds"] += stats.db_seconds
+        data["render_seconds"] += stats.render_seconds
+        data["bytes"] += size
+        data["slow_queries"] += stats.slow_queries
+        status_key = (route, method, str(status))
+        current["statuses"][status_key] = current["statuses"].get(status_key, 0) + 1
+        due = time.monotonic() - current["flushed"] >= options["FLUSH_SECONDS"]
+        if due:
+            current["flushed"] = time.monotonic()
+    if due:
+        flush()
+
+
+def snapshot():
+    with _lock:
+        current = state()
+        return {
+            "routes": [[route, method, {**data, "buckets": list(data["buckets"])}]
+                       for (route, method), data in current["routes"].items()],
+            "statuses": [[*key, count] for key, count in current["statuses"].items()],
+        }
+
+
+def flush():
+    """Grava o snapshot deste processo (escrita atômica: quem lê nunca vê meio arquivo)."""
+    data = snapshot()
+    name = _state["file"]
+    path = directory()
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+        temporary = path / f".{name}.{threading.get_ident()}.tmp"
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, path / name)
+    except OSError:
+        logger.exception("Não foi possível gravar as métricas em %s.", path)
+
+
+def collect():
+    """Soma os snapshots de todos os processos (o deste é gravado antes)."""
+    flush()
+    routes, statuses = {}, {}
+    for path in directory().glob("*.json"):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for route, method, values in data["routes"]:
+            total = routes.get((route, method))
+            if total is None:
+                routes[(route, method)] = values
+                continue
+            if len(total["buckets"]) != len(values["buckets"]):
+                continue  # arquivo de antes de mudar BUCKETS
+            for name, value in values.items():
+                total[name] = ([a + b for a, b in zip(total[name], value)] if name == "buckets"
+                               else total[name] + value)
+        for route, method, status, count in data["statuses"]:
+            statuses[(route, method, status)] = statuses.get((route, method, status), 0) + count
+    return routes, statuses
+
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    """Texto no formato de exposição do Prometheus (0.0.4)."""
+    routes, statuses = collect()
+    buckets = metrics_settings()["BUCKETS"]
+    lines = [
+        "# HELP dogdex_requests_total Requisições por rota, método e status.",
+        "# TYPE dogdex_requests_total counter",
+    ]
+    for (route, method, status), count in sorted(statuses.items()):
+        labels = f'route="{label(route)}",method="{label(method)}",status="{status}"'
+        lines.append(f"dogdex_requests_total{{{labels}}} {count}")
+    lines += [
+        "# HELP dogdex_request_duration_seconds Latência das requisições por rota.",
+        "# TYPE dogdex_request_duration_seconds histogram",
+    ]
+    for (route, method), data in sorted(routes.items()):
+        labels = f'route="{label(route)}",method="{label(method)}"'
+        cumulative = 0
+        for bound, count in zip([*buckets, "+Inf"], data["buckets"]):
+            cumulative += count
+            lines.append(f'dogdex_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"dogdex_request_duration_seconds_sum{{{labels}}} {data['sum']}")
+        lines.append(f"dogdex_request_duration_seconds_count{{{labels}}} {data['count']}")
+    for key, name, description in COUNTERS:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for (route, method), data in sorted(routes.items()):
+            lines.append(f'{name}{{route="{label(route)}",method="{label(method)}"}} {data[key]}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Coloque logo depois do SecurityMiddleware, para a latência cobrir o resto da pilha."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_settings()["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    @staticmethod
+    def start(request):
+        stats = RequestStats(request, metrics_settings())
+        return stats, _current.set(stats), time.perf_counter()
+
+    @staticmethod
+    def finish(request, response, stats, start):
+        elapsed = time.perf_counter() - start
+        route = route_of(request)
+        if route not in EXCLUDED_ROUTES:
+            size = 0 if response.streaming else len(response.content)
+            observe(route, request.method, response.status_code, elapsed, stats, size)
+        return response
+
+    def process_template_response(self, request, response):
+        # Response do DRF: o render acontece logo depois deste hook
+        stats = _current.get()
+        if stats is not None:
+            stats.render_started = time.perf_counter()
+            response.add_post_render_callback(self.rendered)
+        return response
+
+    @staticmethod
+    def rendered(response):
+        stats = _current.get()
+        if stats is not None and stats.render_started is not None:
+            stats.render_seconds += time.perf_counter() - stats.render_started
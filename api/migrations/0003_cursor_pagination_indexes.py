@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:29
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_servicetype_dog_is_active_alter_dog_owner_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicerecord',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['-performed_at', '-day', '-created_at', '-id'], name='api_service_perform_82afdf_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='stay',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['-check_in', '-id'], name='api_stay_check_i_95230c_btree'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:31
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_services_total(apps, schema_editor):
+    Stay = apps.get_model('api', 'Stay')
+    ServiceRecord = apps.get_model('api', 'ServiceRecord')
+    totals = (
+        ServiceRecord.objects.filter(stay=OuterRef('pk'))
+        .order_by().values('stay').annotate(total=Sum('price')).values('total')
+    )
+    Stay.objects.update(services_total=Coalesce(
+        Subquery(totals), Value(Decimal('0.00')), output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stay',
+            name='services_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_services_total, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:34
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_stay_services_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('currency', models.CharField(default='BRL', max_length=3)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='billing_rollups', to='api.owner')),
+                ('service_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='api.servicetype')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BTreeIndex(fields=['month'], name='api_billing_month_365bc7_btree')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'month', 'service_type', 'currency'), name='api_billingrollup_key', nulls_distinct=False)],
+            },
+        ),
+    ]
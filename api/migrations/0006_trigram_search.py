@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:35
+
+import api.functions
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# unaccent() é só STABLE (depende do dicionário); o wrapper com dicionário fixo
+# pode ser marcado IMMUTABLE e usado nos índices de expressão.
+CREATE_UNACCENT_FUNCTION = """
+CREATE OR REPLACE FUNCTION dogdex_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+DROP_UNACCENT_FUNCTION = "DROP FUNCTION IF EXISTS dogdex_unaccent(text);"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_billing_rollup'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_UNACCENT_FUNCTION, DROP_UNACCENT_FUNCTION),
+        migrations.AddIndex(
+            model_name='dog',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('name')), name='gin_trgm_ops'), name='api_dog_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='dog',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('breed')), name='gin_trgm_ops'), name='api_dog_breed_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('name')), name='gin_trgm_ops'), name='api_owner_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerecord',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('notes')), name='gin_trgm_ops'), name='api_service_notes_trgm'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:36
+
+import re
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# cópias de api.models na data da migração: migrações não importam código vivo do app
+def only_digits(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def normalize_phone(value):
+    digits = only_digits(value)
+    if len(digits) in (12, 13) and digits.startswith("55"):
+        digits = digits[2:]
+    return digits.lstrip("0")
+
+
+def backfill_digits(apps, schema_editor):
+    Owner = apps.get_model('api', 'Owner')
+    batch = []
+    for owner in Owner.objects.only('id', 'phone', 'cpf').iterator(chunk_size=2000):
+        owner.phone_digits = normalize_phone(owner.phone)
+        owner.cpf_digits = only_digits(owner.cpf) or None
+        batch.append(owner)
+        if len(batch) == 2000:
+            Owner.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+            batch = []
+    Owner.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='owner',
+            name='cpf_digits',
+            field=models.CharField(blank=True, editable=False, max_length=11, null=True),
+        ),
+        migrations.AddField(
+            model_name='owner',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_digits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='owner',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['phone_digits'], name='api_owner_phone_d_f053e3_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['cpf_digits'], name='api_owner_cpf_dig_f257f7_btree'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:46
+
+import django.contrib.postgres.indexes
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32)),
+                ('object_id', models.UUIDField()),
+                ('dog_id', models.UUIDField(blank=True, null=True)),
+                ('owner_id', models.UUIDField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BTreeIndex(fields=['dog_id', 'id'], name='api_liveeve_dog_id_03a194_btree'), django.contrib.postgres.indexes.BTreeIndex(fields=['owner_id', 'id'], name='api_liveeve_owner_i_b73428_btree'), django.contrib.postgres.indexes.BTreeIndex(fields=['created_at'], name='api_liveeve_created_19208f_btree')],
+            },
+        ),
+    ]
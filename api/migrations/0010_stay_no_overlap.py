@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:49
+
+import api.functions
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+# tstzrange() falha com check_out < check_in; essas precisam ser corrigidas antes
+FIND_INVERTED = """
+SELECT id, check_in, check_out FROM api_stay
+ WHERE check_in IS NOT NULL AND check_out < check_in
+ LIMIT 20
+"""
+
+FIND_OVERLAPS = """
+SELECT a.id, b.id FROM api_stay a JOIN api_stay b
+    ON a.dog_id = b.dog_id AND a.id < b.id
+   AND tstzrange(a.check_in, a.check_out, '[)') && tstzrange(b.check_in, b.check_out, '[)')
+ WHERE a.check_in IS NOT NULL AND b.check_in IS NOT NULL
+ LIMIT 20
+"""
+
+
+def check_overlaps(apps, schema_editor):
+    # falha com uma mensagem útil em vez do erro genérico do ADD CONSTRAINT
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FIND_INVERTED)
+        inverted = cursor.fetchall()
+        if inverted:
+            raise RuntimeError(
+                "Hospedagens com check_out anterior ao check_in; corrija antes de migrar:\n"
+                + "\n".join(f"  {stay_id}: {check_in} → {check_out}" for stay_id, check_in, check_out in inverted)
+            )
+        cursor.execute(FIND_OVERLAPS)
+        pairs = cursor.fetchall()
+    if pairs:
+        raise RuntimeError(
+            "Hospedagens sobrepostas do mesmo cão; corrija antes de migrar:\n"
+            + "\n".join(f"  {a} x {b}" for a, b in pairs)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_live_events'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),  # igualdade de uuid (dog) dentro do índice GiST
+        migrations.RunPython(check_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stay',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('check_in__isnull', False)), expressions=[(api.functions.TsTzRange('check_in', 'check_out', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&'), ('dog', '=')], name='api_stay_no_overlap'),
+        ),
+    ]
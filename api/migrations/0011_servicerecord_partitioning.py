@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:55
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncDate
+
+# Converte api_servicerecord numa tabela particionada por mês em event_date.
+# PK passa a ser (id, event_date), exigência do Postgres para particionar;
+# índices e FKs são recriados no pai (e propagados às partições) com os
+# mesmos nomes, então o estado do Django não muda. Cria as partições dos
+# meses com dados até 3 meses à frente, mais a partição DEFAULT; as seguintes
+# vêm de `manage.py create_service_partitions`. Os meses vão no máximo de 5
+# anos atrás a 1 ano à frente, para uma data errada (ex.: ano 0001) não virar
+# milhares de partições; o que sobrar fica na DEFAULT e
+# `create_service_partitions --from` cria esses meses depois, se preciso.
+PARTITION_TABLE = """
+DO $$
+DECLARE
+    item record;
+    month date;
+    last_month date;
+BEGIN
+    CREATE TEMP TABLE dogdex_servicerecord_ddl ON COMMIT DROP AS
+        SELECT indexdef AS ddl FROM pg_indexes
+         WHERE schemaname = current_schema() AND tablename = 'api_servicerecord'
+           AND indexname <> 'api_servicerecord_pkey'
+        UNION ALL
+        SELECT format('ALTER TABLE api_servicerecord ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid))
+          FROM pg_constraint WHERE conrelid = 'api_servicerecord'::regclass AND contype <> 'p';
+
+    ALTER TABLE api_servicerecord RENAME TO api_servicerecord_old;
+    ALTER INDEX api_servicerecord_pkey RENAME TO api_servicerecord_old_pkey;
+    CREATE TABLE api_servicerecord (LIKE api_servicerecord_old INCLUDING DEFAULTS) PARTITION BY RANGE (event_date);
+    ALTER TABLE api_servicerecord ADD CONSTRAINT api_servicerecord_pkey PRIMARY KEY (id, event_date);
+    CREATE TABLE api_servicerecord_default PARTITION OF api_servicerecord DEFAULT;
+
+    SELECT date_trunc('month', min(event_date))::date, date_trunc('month', max(event_date))::date
+      INTO month, last_month FROM api_servicerecord_old;
+    month := least(coalesce(month, current_date), current_date);
+    month := greatest(month, (current_date - interval '5 years')::date);
+    month := date_trunc('month', month)::date;
+    last_month := least(greatest(coalesce(last_month, current_date), current_date), (current_date + interval '1 year')::date);
+    last_month := (date_trunc('month', last_month) + interval '3 months')::date;
+    WHILE month <= last_month LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF api_servicerecord FOR VALUES FROM (%L) TO (%L)',
+                       'api_servicerecord_p' || to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date);
+        month := (month + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO api_servicerecord SELECT * FROM api_servicerecord_old;
+    DROP TABLE api_servicerecord_old;
+    FOR item IN SELECT ddl FROM dogdex_servicerecord_ddl LOOP
+        EXECUTE item.ddl;
+    END LOOP;
+END $$;
+"""
+
+
+def backfill_event_date(apps, schema_editor):
+    ServiceRecord = apps.get_model('api', 'ServiceRecord')
+    ServiceRecord.objects.update(event_date=Coalesce('day', TruncDate('performed_at'), TruncDate('created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_stay_no_overlap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicerecord',
+            name='event_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_event_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='servicerecord',
+            name='event_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.RunSQL(PARTITION_TABLE),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+import django.contrib.postgres.indexes
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_import_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(max_length=16)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='health',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='servicerecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='stay',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='dog',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['updated_at', 'id'], name='api_dog_updated_2e7b47_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='health',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['updated_at', 'id'], name='api_health_updated_89b974_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['updated_at', 'id'], name='api_owner_updated_6627b6_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerecord',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['updated_at', 'id'], name='api_service_updated_99554b_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='stay',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['updated_at', 'id'], name='api_stay_updated_c7c304_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['deleted_at', 'id'], name='api_tombsto_deleted_91cf6c_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['entity', 'object_id'], name='api_tombsto_entity_7e3f9f_btree'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:10
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_occurred_at(apps, schema_editor):
+    # mesma regra de models.occurred_at_of: performed_at ou a meia-noite local de day
+    table = apps.get_model('api', 'ServiceRecord')._meta.db_table
+    schema_editor.execute(
+        f"UPDATE {table} SET occurred_at = COALESCE(performed_at, day::timestamp AT TIME ZONE %s, created_at)",
+        [settings.TIME_ZONE],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='servicerecord',
+            options={'ordering': ['-occurred_at']},
+        ),
+        migrations.RemoveIndex(
+            model_name='servicerecord',
+            name='api_service_perform_82afdf_btree',
+        ),
+        migrations.AddField(
+            model_name='servicerecord',
+            name='occurred_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_occurred_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='servicerecord',
+            name='occurred_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='servicerecord',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['-occurred_at', '-id'], name='api_service_occurre_81572e_btree'),
+        ),
+    ]
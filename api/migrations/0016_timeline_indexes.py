@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:27
+
+import datetime
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_servicerecord_occurred_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicerecord',
+            index=django.contrib.postgres.indexes.BTreeIndex(fields=['dog', '-occurred_at', '-id'], name='api_service_dog_id_a4201f_btree'),
+        ),
+        migrations.AddIndex(
+            model_name='stay',
+            index=django.contrib.postgres.indexes.BTreeIndex(models.F('dog'), models.OrderBy(django.db.models.functions.comparison.Coalesce('check_in', models.Value(datetime.datetime(1, 1, 1, 0, 0, tzinfo=datetime.timezone.utc), output_field=models.DateTimeField())), descending=True), models.OrderBy(models.F('id'), descending=True), name='api_stay_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:29
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='owner',
+            name='cpf',
+            field=models.CharField(blank=True, max_length=14, null=True, unique=True, validators=[api.models.validate_cpf]),
+        ),
+    ]
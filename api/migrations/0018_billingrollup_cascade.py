@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# linhas zeradas deixadas pelo billing.apply antigo (hoje ele as apaga)
+DELETE_EMPTY_ROLLUPS = "DELETE FROM api_billingrollup WHERE count = 0 AND total = 0"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_owner_cpf_validator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='billingrollup',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='billing_rollups', to='api.owner'),
+        ),
+        migrations.AlterField(
+            model_name='billingrollup',
+            name='service_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.servicetype'),
+        ),
+        migrations.RunSQL(DELETE_EMPTY_ROLLUPS, migrations.RunSQL.noop),
+    ]
@@ -1,24 +1,93 @@
-import uuid
+import datetime
+import re
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.contrib.postgres.indexes import BTreeIndex
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import RangeOperators
+from django.contrib.postgres.indexes import BTreeIndex, GinIndex, OpClass
+
+from .functions import search_normalized, stay_period, stay_timestamp
+from .ids import uuid7
+
+
+def trigram_index(field, name):
+    """Índice GIN trigram sobre o texto normalizado (minúsculo, sem acento) de `field`."""
+    return GinIndex(OpClass(search_normalized(field), name="gin_trgm_ops"), name=name)
+
+
+class LoadedValuesMixin:
+    """Guarda os valores lidos do banco em `_loaded`, para os signals calcularem deltas (api/signals.py)."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = {
+            name: value for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+
+def only_digits(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def normalize_phone(value):
+    """'(11) 99999-0000', '+55 11 99999-0000' e '011999990000' viram '11999990000'."""
+    digits = only_digits(value)
+    if len(digits) in (12, 13) and digits.startswith("55"):
+        digits = digits[2:]
+    return digits.lstrip("0")
+
+
+def validate_cpf(value):
+    """CPF em qualquer formatação, com exatamente 11 dígitos (cabe em cpf_digits)."""
+    if value and len(only_digits(value)) != 11:
+        raise ValidationError("CPF deve ter 11 dígitos.")
 
 
 class Owner(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=20)
     email = models.CharField(max_length=100, null=True, blank=True)
-    cpf = models.CharField(max_length=14, unique=True, null=True, blank=True)
+    cpf = models.CharField(max_length=14, unique=True, null=True, blank=True, validators=[validate_cpf])
     address = models.CharField(max_length=200, blank=True)
     district = models.CharField(max_length=100, blank=True)
 
+    # só dígitos, para busca exata por índice no check-in (preenchidos no save)
+    phone_digits = models.CharField(max_length=20, blank=True, editable=False)
+    cpf_digits = models.CharField(max_length=11, null=True, blank=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            trigram_index("name", "api_owner_name_trgm"),
+            BTreeIndex(fields=["phone_digits"]),
+            BTreeIndex(fields=["cpf_digits"]),
+            BTreeIndex(fields=["updated_at", "id"]),  # delta do /api/sync/
+        ]
+
+    def fill_normalized(self):
+        self.phone_digits = normalize_phone(self.phone)
+        self.cpf_digits = only_digits(self.cpf) or None
+
+    def save(self, *args, **kwargs):
+        self.fill_normalized()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "phone_digits", "cpf_digits", "updated_at"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
-class Dog(models.Model):
+class Dog(LoadedValuesMixin, models.Model):
     class Size(models.TextChoices):
         PEQUENO = "P", "Pequeno"
         MEDIO = "M", "Médio"
@@ -28,7 +97,7 @@ class Dog(models.Model):
         MACHO = "M", "Macho"
         FEMEA = "F", "Fêmea"
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     # Evita perder histórico se excluírem o tutor:
     owner = models.ForeignKey(Owner, on_delete=models.PROTECT, related_name="dogs")
     name = models.CharField(max_length=100)
@@ -40,13 +109,24 @@ class Dog(models.Model):
     instagram = models.CharField(max_length=100, null=True, blank=True)
     is_active = models.BooleanField(default=True)  # opcional: soft-delete
 
+    updated_at = models.DateTimeField(auto_now=True)
+    # incrementado a cada mudança em health/stays/services do cão (api/signals.py); compõe o ETag
+    revision = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            trigram_index("name", "api_dog_name_trgm"),
+            trigram_index("breed", "api_dog_breed_trgm"),
+            BTreeIndex(fields=["updated_at", "id"]),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.owner.name})"
 
 
 class Health(models.Model):
     dog = models.OneToOneField(Dog, on_delete=models.CASCADE, related_name="health")
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     has_vet = models.BooleanField(default=False)
     vet_name = models.CharField(max_length=100, null=True, blank=True)
@@ -61,12 +141,19 @@ class Health(models.Model):
     allergies = models.TextField(null=True, blank=True)
     special_recommendations = models.TextField(null=True, blank=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            BTreeIndex(fields=["updated_at", "id"]),
+        ]
+
     def __str__(self):
         return f"Dados de saúde de {self.dog.name}"
 
 
 class ServiceType(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
     base_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -75,19 +162,36 @@ class ServiceType(models.Model):
         return self.name
 
 
-class Stay(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+class Stay(LoadedValuesMixin, models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     dog = models.ForeignKey(Dog, on_delete=models.PROTECT, related_name="stays")
     owner = models.ForeignKey(Owner, on_delete=models.PROTECT, related_name="stays")  # snapshot do tutor
     check_in = models.DateTimeField(null=True, blank=True)   # use DateField se preferir
     check_out = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
     price_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    # soma de services.price, mantida incrementalmente por api/signals.py
+    services_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"), editable=False)
+    updated_at = models.DateTimeField(auto_now=True)  # UPDATEs via queryset também o atualizam (api/signals.py)
 
     class Meta:
         indexes = [
             BTreeIndex(fields=["dog", "check_in"]),
             BTreeIndex(fields=["check_in"]),
+            # casa com a ordenação da paginação por cursor (-check_in, -id)
+            BTreeIndex(fields=["-check_in", "-id"]),
+            BTreeIndex(fields=["updated_at", "id"]),
+            # casa com o ramo de hospedagens da timeline (api/timeline.py)
+            BTreeIndex("dog", stay_timestamp().desc(), F("id").desc(), name="api_stay_timeline_idx"),
+        ]
+        constraints = [
+            # um cão não pode ter duas hospedagens sobrepostas; o índice GiST
+            # da constraint também atende as consultas de ocupação por período
+            ExclusionConstraint(
+                name="api_stay_no_overlap",
+                expressions=[(stay_period(), RangeOperators.OVERLAPS), ("dog", RangeOperators.EQUAL)],
+                condition=models.Q(check_in__isnull=False),
+            ),
         ]
         ordering = ["-check_in"]
 
@@ -95,12 +199,32 @@ class Stay(models.Model):
         if self.check_in and self.check_out and self.check_out < self.check_in:
             raise ValidationError("check_out não pode ser anterior ao check_in.")
 
+    def save(self, *args, **kwargs):
+        # o post_save (BillingRollup, revision do cão, LiveEvent) grava na mesma transação da linha
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Hospedagem de {self.dog.name} ({self.check_in} → {self.check_out})"
 
 
-class ServiceRecord(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+def event_date_of(performed_at, day):
+    if performed_at is not None:
+        return timezone.localtime(performed_at).date() if timezone.is_aware(performed_at) else performed_at.date()
+    return day or timezone.localdate()
+
+
+def occurred_at_of(performed_at, day):
+    """Instante do serviço para ordenação: performed_at ou a meia-noite local de day."""
+    if performed_at is not None:
+        return performed_at
+    if day is not None:
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return timezone.now()
+
+
+class ServiceRecord(LoadedValuesMixin, models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     dog = models.ForeignKey(Dog, on_delete=models.PROTECT, related_name="services")
     owner = models.ForeignKey(Owner, on_delete=models.PROTECT, related_name="services")  # snapshot do tutor
     service_type = models.ForeignKey(ServiceType, on_delete=models.PROTECT)
@@ -117,14 +241,24 @@ class ServiceRecord(models.Model):
     notes = models.TextField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # chave de partição mensal da tabela (migração 0011, api/partitions.py): data local de performed_at ou day
+    event_date = models.DateField(editable=False)
+    # nunca nulo (preenchido no save): a paginação por cursor vira uma comparação (occurred_at, id) < (...)
+    occurred_at = models.DateTimeField(editable=False)
 
     class Meta:
         indexes = [
             BTreeIndex(fields=["dog", "performed_at"]),
             BTreeIndex(fields=["dog", "day"]),
             BTreeIndex(fields=["created_at"]),
+            # casa com a ordenação da paginação por cursor (ver api/pagination.py)
+            BTreeIndex(fields=["-occurred_at", "-id"]),
+            BTreeIndex(fields=["dog", "-occurred_at", "-id"]),  # ramo de serviços da timeline
+            trigram_index("notes", "api_service_notes_trgm"),
+            BTreeIndex(fields=["updated_at", "id"]),
         ]
-        ordering = ["-performed_at", "-day", "-created_at"]
+        ordering = ["-occurred_at"]
 
     def clean(self):
         if not self.performed_at and not self.day:
@@ -134,14 +268,131 @@ class ServiceRecord(models.Model):
         if self.stay and self.stay.dog_id != self.dog_id:
             raise ValidationError("O ServiceRecord deve referenciar a mesma dog de Stay.")
 
-    def save(self, *args, **kwargs):
-        # Preenche snapshot do owner e preço padrão
+    def fill_defaults(self):
+        # Preenche snapshot do owner, preço padrão, a data da partição e o instante de ordenação
         if not self.owner_id:
             self.owner = self.dog.owner
         if self.price is None and self.service_type and self.service_type.base_price is not None:
             self.price = self.service_type.base_price
-        super().save(*args, **kwargs)
+        self.event_date = event_date_of(self.performed_at, self.day)
+        self.occurred_at = occurred_at_of(self.performed_at, self.day)
+
+    def save(self, *args, **kwargs):
+        self.fill_defaults()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "event_date", "occurred_at", "updated_at"}
+        # o post_save (services_total, BillingRollup, revision do cão, LiveEvent) grava na mesma transação da linha
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         when = self.performed_at.date() if self.performed_at else self.day
-        return f"{self.service_type.name} - {self.dog.name} ({when})"
\ No newline at end of file
+        return f"{self.service_type.name} - {self.dog.name} ({when})"
+
+
+class BillingRollup(models.Model):
+    """
+    Faturamento agregado por tutor, mês, tipo de serviço e moeda.
+
+    service_type nulo é a hospedagem (Stay.price_total). Mantido
+    incrementalmente por api/billing.py; `manage.py rebuild_billing`
+    recalcula qualquer intervalo de meses a partir dos dados brutos.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # tabela derivada: não impede apagar o tutor ou o tipo de serviço (rebuild_billing a refaz)
+    owner = models.ForeignKey(Owner, on_delete=models.CASCADE, related_name="billing_rollups")
+    month = models.DateField()  # primeiro dia do mês
+    service_type = models.ForeignKey(ServiceType, on_delete=models.CASCADE, null=True, blank=True)
+    currency = models.CharField(max_length=3, default="BRL")
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "month", "service_type", "currency"],
+                name="api_billingrollup_key",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            BTreeIndex(fields=["month"]),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} {self.month:%Y-%m} {self.service_type_id or 'hospedagem'}: {self.total} {self.currency}"
+
+
+class LiveEvent(models.Model):
+    """
+    Log de mudanças em Stay/ServiceRecord para o stream em tempo real
+    (api/events.py). O id crescente é o `Last-Event-ID` do SSE; dog_id e
+    owner_id não são FKs para o evento sobreviver à remoção do registro.
+    """
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=32)  # ex.: "stay.created", "service.deleted"
+    object_id = models.UUIDField()
+    dog_id = models.UUIDField(null=True, blank=True)
+    owner_id = models.UUIDField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            BTreeIndex(fields=["dog_id", "id"]),
+            BTreeIndex(fields=["owner_id", "id"]),
+            BTreeIndex(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id}"
+
+
+class Tombstone(models.Model):
+    """
+    Registro apagado (ou cão desativado), para o delta de /api/sync/
+    (api/sync.py). `entity` é o nome da coleção no sync ("dogs", "stays"...).
+    """
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=16)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            BTreeIndex(fields=["deleted_at", "id"]),
+            BTreeIndex(fields=["entity", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
+
+
+class ImportJob(models.Model):
+    """
+    Importação de cadastros em lote (api/onboarding.py). Guarda o progresso
+    por bloco de linhas, para retomar o mesmo arquivo (mesmo checksum) de
+    onde parou, e o relatório de erros por linha.
+    """
+    class Status(models.TextChoices):
+        RUNNING = "running", "Em andamento"
+        FAILED = "failed", "Interrompida"
+        DONE = "done", "Concluída"
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    file_name = models.CharField(max_length=255)
+    checksum = models.CharField(max_length=64, db_index=True)  # sha256 do arquivo
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_owners = models.PositiveIntegerField(default=0)
+    reused_owners = models.PositiveIntegerField(default=0)  # linhas com CPF já cadastrado ou repetido no arquivo
+    created_dogs = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # [{"row": n, "errors": {...}}]
+    message = models.TextField(blank=True)  # motivo da interrupção
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.processed_rows}/{self.total_rows})"
@@ -0,0 +1,56 @@
+import datetime
+
+from django.db import connection
+from django.utils import timezone
+
+from .functions import stay_period
+from .models import Dog, Stay
+
+DEFAULT_DAYS = 60
+MAX_DAYS = 366
+
+# dias locais (TIME_ZONE) x hospedagens que tocam o dia; o && sobre
+# tstzrange(check_in, check_out, '[)') usa o índice GiST de api_stay_no_overlap
+OCCUPANCY_SQL = """
+SELECT day::date, dog.size, count(DISTINCT stay.dog_id)
+  FROM generate_series(%(start)s::timestamp, %(end)s::timestamp, interval '1 day') AS day
+  JOIN {stay} stay
+    ON stay.check_in IS NOT NULL
+   AND tstzrange(stay.check_in, stay.check_out, '[)')
+       && tstzrange(day AT TIME ZONE %(tz)s, (day + interval '1 day') AT TIME ZONE %(tz)s, '[)')
+  JOIN {dog} dog ON dog.id = stay.dog_id
+ WHERE %(size)s::varchar IS NULL OR dog.size = %(size)s
+ GROUP BY 1, 2
+"""
+
+
+def overlapping(dog_id, check_in, check_out=None):
+    """Hospedagens do cão que se sobrepõem a [check_in, check_out); check_out nulo = sem data de saída."""
+    return (
+        Stay.objects.annotate(period=stay_period())
+        .filter(dog_id=dog_id, check_in__isnull=False, period__overlap=(check_in, check_out))
+    )
+
+
+def occupancy(start, end, size=None):
+    """
+    Cães hospedados em cada dia de [start, end], no total e por porte.
+    Portes fora de Dog.Size (cadastros legados) entram só no total.
+    """
+    sizes = [size] if size else Dog.Size.values
+    days = {
+        start + datetime.timedelta(days=offset): {size: 0 for size in sizes}
+        for offset in range((end - start).days + 1)
+    }
+    totals = dict.fromkeys(days, 0)
+    sql = OCCUPANCY_SQL.format(stay=Stay._meta.db_table, dog=Dog._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"start": start, "end": end, "size": size, "tz": timezone.get_current_timezone_name()})
+        for day, dog_size, count in cursor.fetchall():
+            totals[day] += count  # cada cão tem um porte só: somar por porte não conta ninguém duas vezes
+            if dog_size in days[day]:
+                days[day][dog_size] = count
+    return [
+        {"day": day, "total": totals[day], "by_size": by_size}
+        for day, by_size in days.items()
+    ]
@@ -0,0 +1,203 @@
+"""
+Importação em lote do cadastro (tutor + cão + saúde) a partir de planilha
+CSV/XLSX, para migrar a base legada.
+
+Colunas: as do tutor sem prefixo (name, phone, email, cpf, address,
+district), as do cão com `dog_` (dog_name, dog_size, ...) e as de saúde
+com `health_` (health_has_vet, ...). Uma linha por cão; linhas com o mesmo
+CPF (ou CPF já cadastrado) reaproveitam o tutor. Cada bloco de linhas é
+gravado com bulk_create numa transação junto com o progresso do ImportJob,
+então reenviar o mesmo arquivo retoma do primeiro bloco não gravado. Linhas
+inválidas ou recusadas pelo banco ficam em ImportJob.errors sem parar o job.
+"""
+import csv
+import hashlib
+import io
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import cache as response_cache
+from .models import Dog, Health, ImportJob, Owner, only_digits
+from .serializers import OnboardingRowSerializer
+
+CHUNK_SIZE = 500
+PREFIXES = {"dog_": "dog", "health_": "health"}
+BOOLEANS = {"sim": True, "s": True, "não": False, "nao": False, "n": False}
+
+
+class ImportFileError(ValueError):
+    """Arquivo ilegível ou sem as colunas mínimas."""
+
+
+def read_csv(content):
+    text = content.decode("utf-8-sig")
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.DictReader(io.StringIO(text), dialect=dialect))
+
+
+def read_xlsx(content):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Importação de XLSX requer o pacote openpyxl; exporte a planilha como CSV.")
+    sheet = load_workbook(io.BytesIO(content), read_only=True, data_only=True).worksheets[0]
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(value or "").strip() for value in next(rows, ())]
+    return [dict(zip(header, row)) for row in rows if any(value not in (None, "") for value in row)]
+
+
+def read_rows(file_name, content):
+    """Linhas da planilha como dicts coluna -> valor."""
+    try:
+        rows = read_xlsx(content) if file_name.lower().endswith(".xlsx") else read_csv(content)
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV deve estar em UTF-8.")
+    except ImportFileError:
+        raise
+    except Exception as exc:  # planilha corrompida
+        raise ImportFileError(f"Não foi possível ler o arquivo: {exc}")
+    if rows and "name" not in rows[0]:
+        raise ImportFileError("A planilha precisa da coluna 'name' (nome do tutor).")
+    return rows
+
+
+def cell(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # CPF/telefone numéricos no XLSX
+    if isinstance(value, str):
+        value = value.strip()
+        return BOOLEANS.get(value.lower(), value)
+    return value
+
+
+def nest(row):
+    """{"dog_name": ...} -> {"owner": {...}, "dog": {"name": ...}}; células vazias ficam de fora."""
+    data = {"owner": {}}
+    for column, value in row.items():
+        value = cell(value)
+        if not column or value in (None, ""):
+            continue
+        column = column.strip()
+        group = "owner"
+        for prefix, name in PREFIXES.items():
+            if column.startswith(prefix):
+                group, column = name, column.removeprefix(prefix)
+        data.setdefault(group, {})[column] = value
+    return data
+
+
+def find_job(file_name, content, restart=False):
+    """ImportJob do arquivo: o último com o mesmo conteúdo (para retomar) ou um novo."""
+    checksum = hashlib.sha256(content).hexdigest()
+    job = None if restart else ImportJob.objects.filter(checksum=checksum).order_by("-created_at").first()
+    return job or ImportJob(file_name=file_name, checksum=checksum)
+
+
+def import_file(file_name, content, chunk_size=CHUNK_SIZE, restart=False):
+    """Importa (ou retoma) o arquivo; devolve o ImportJob com contadores e erros por linha."""
+    rows = read_rows(file_name, content)
+    job = find_job(file_name, content, restart)
+    if job.status == ImportJob.Status.DONE:
+        return job
+    job.total_rows = len(rows)
+    job.status, job.message = ImportJob.Status.RUNNING, ""
+    job.save()
+    try:
+        while job.processed_rows < len(rows):
+            start = job.processed_rows
+            chunk = list(islice(enumerate(rows, start=2), start, start + chunk_size))  # linha 1 = cabeçalho
+            job = import_chunk(job.pk, start, chunk)
+    except DatabaseError as exc:
+        job.refresh_from_db()
+        job.status, job.message = ImportJob.Status.FAILED, str(exc)
+        job.save(update_fields=["status", "message", "updated_at"])
+        return job
+    finally:
+        response_cache.invalidate(Owner, Dog, Health)
+    job.status = ImportJob.Status.DONE
+    job.save(update_fields=["status", "updated_at"])
+    return job
+
+
+@transaction.atomic
+def import_chunk(job_id, start, chunk):
+    """
+    Valida e grava um bloco de (número da linha, dict); o progresso do job vai
+    na mesma transação. Se o banco recusar o bloco, regrava linha a linha, cada
+    uma num savepoint: a linha recusada vai para job.errors e o job segue.
+    """
+    job = ImportJob.objects.select_for_update().get(pk=job_id)
+    if job.processed_rows != start:
+        raise DatabaseError("Esta importação está sendo processada por outra requisição.")
+
+    # uma instância validando todas as linhas, como o ListSerializer (montar os campos por linha custa 10x)
+    serializer, valid = OnboardingRowSerializer(), []
+    for line, row in chunk:
+        try:
+            valid.append((line, serializer.run_validation(nest(row))))
+        except ValidationError as exc:
+            job.errors.append({"row": line, "errors": as_serializer_error(exc)})
+
+    try:
+        with transaction.atomic():
+            counts = save_rows([data for _, data in valid])
+    except DatabaseError:
+        counts = [0, 0, 0]
+        for line, data in valid:
+            try:
+                with transaction.atomic():
+                    row_counts = save_rows([data])
+            except DatabaseError as exc:
+                job.errors.append({"row": line, "errors": {"non_field_errors": [f"Erro ao gravar a linha: {exc}"]}})
+                continue
+            counts = [total + count for total, count in zip(counts, row_counts)]
+        job.errors.sort(key=lambda error: error["row"])
+
+    created_owners, created_dogs, reused_owners = counts
+    job.processed_rows = start + len(chunk)
+    job.created_owners += created_owners
+    job.created_dogs += created_dogs
+    job.reused_owners += reused_owners
+    job.save()
+    return job
+
+
+def save_rows(rows):
+    """
+    Grava as linhas já validadas com um bulk_create por tabela; devolve
+    (tutores criados, cães criados, tutores reaproveitados). Tutor com o mesmo
+    CPF (em qualquer formatação) de outra linha ou do banco é reaproveitado.
+    """
+    cpfs = {only_digits(data["owner"].get("cpf")) for data in rows} - {""}
+    raw_cpfs = {data["owner"]["cpf"] for data in rows if data["owner"].get("cpf")}
+    # também pelo CPF como gravado: cpf é único mesmo quando cpf_digits de um cadastro antigo não bate
+    existing = Owner.objects.filter(Q(cpf_digits__in=cpfs) | Q(cpf__in=raw_cpfs))
+    owners = {only_digits(owner.cpf): owner for owner in existing}
+    new_owners, dogs, healths, reused = [], [], [], 0
+    for data in rows:
+        cpf = only_digits(data["owner"].get("cpf"))
+        owner = owners.get(cpf) if cpf else None
+        if owner is None:
+            owner = Owner(**data["owner"])
+            owner.fill_normalized()
+            new_owners.append(owner)
+            if cpf:
+                owners[cpf] = owner
+        else:
+            reused += 1
+        if "dog" in data:
+            dog = Dog(owner=owner, **data["dog"])
+            dogs.append(dog)
+            healths.append(Health(dog=dog, **data.get("health", {})))
+
+    Owner.objects.bulk_create(new_owners)
+    Dog.objects.bulk_create(dogs)
+    Health.objects.bulk_create(healths)
+    return [len(new_owners), len(dogs), reused]
@@ -0,0 +1,200 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import F, Q, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+from .functions import Row
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) sobre todas as colunas da ordenação.
+
+    O CursorPagination do DRF guarda só a primeira coluna e resolve empates
+    com OFFSET, o que não funciona com colunas nulas (performed_at/day).
+    Aqui o cursor guarda a tupla inteira (+ pk como desempate) e a página
+    seguinte vira um WHERE sobre o mesmo índice B-tree da ordenação. Com
+    colunas não nulas e na mesma direção (ex.: occurred_at, id) o WHERE é um
+    `ROW(...) < ROW(...)`, limite do index scan, e a página 1000 custa o
+    mesmo que a primeira.
+
+    NULLs seguem a regra do Postgres: são maiores que qualquer valor
+    (primeiro no DESC, por último no ASC).
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    invalid_cursor_message = "Cursor inválido."
+    tiebreaker = "id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(term.lstrip("-") in (self.tiebreaker, "pk") for term in ordering):
+            # desempate na mesma direção da última coluna, para casar com o índice
+            prefix = "-" if ordering[-1].startswith("-") else ""
+            ordering.append(prefix + self.tiebreaker)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Igual a paginate_queryset, lendo a página com o ORM async."""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """Queryset da página (page_size + 1 linhas), sem executar."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor["r"])
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if self.cursor:
+            queryset = queryset.filter(self._after(self.cursor["p"], reverse), self.bound(self.cursor["p"], reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse = bool(self.cursor and self.cursor["r"])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if cursor["o"] != list(self.ordering) or len(cursor["p"]) != len(self.ordering):
+                raise ValueError
+            cursor["p"] = [
+                None if value is None else self._field(term).to_python(value)
+                for term, value in zip(self.ordering, cursor["p"])
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _link(self, instance, reverse):
+        position = [self._value(instance, term) for term in self.ordering]
+        cursor = {"o": list(self.ordering), "p": position, "r": int(reverse)}
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(",", ":")).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _field(self, term):
+        name = term.lstrip("-")
+        if name == "pk":
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def _value(self, instance, term):
+        value = self._field(term).value_from_object(instance)
+        if value is None or isinstance(value, (int, float)):
+            return value
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()  # sem truncar microssegundos
+        return str(value)
+
+    def _order_by(self, reverse):
+        order_by = []
+        for term in self.ordering:
+            descending = term.startswith("-") != reverse
+            field = F(term.lstrip("-"))
+            order_by.append(field.desc(nulls_first=True) if descending else field.asc(nulls_last=True))
+        return order_by
+
+    def bound(self, position, reverse):
+        """Filtro redundante com o cursor para as subclasses (ex.: a chave de partição); nenhum por padrão."""
+        return Q()
+
+    def _after(self, position, reverse):
+        """
+        Monta `(c1, c2, ...) > (v1, v2, ...)` na ordem da paginação: uma
+        comparação de ROW quando dá, senão expandido em OR porque as
+        direções e os NULLs variam por coluna.
+        """
+        fields = [self._field(term) for term in self.ordering]
+        directions = {term.startswith("-") != reverse for term in self.ordering}
+        if len(directions) == 1 and not any(field.null for field in fields):
+            lookup = LessThan if directions.pop() else GreaterThan
+            return lookup(
+                Row(*(F(term.lstrip("-")) for term in self.ordering)),
+                Row(*(Value(value, output_field=field) for field, value in zip(fields, position))),
+            )
+
+        condition = Q(pk__in=[])
+        equal = Q()
+        for term, value in zip(self.ordering, position):
+            name = term.lstrip("-")
+            descending = term.startswith("-") != reverse
+            if descending:
+                after = Q(**{f"{name}__isnull": False}) if value is None else Q(**{f"{name}__lt": value})
+            else:
+                after = Q(pk__in=[]) if value is None else Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            equal &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+        # limite redundante na primeira coluna: deixa o planner iniciar o
+        # index scan direto na posição do cursor em vez de filtrar do início
+        name, value = self.ordering[0].lstrip("-"), position[0]
+        if value is not None:
+            if self.ordering[0].startswith("-") != reverse:
+                condition &= Q(**{f"{name}__lte": value})
+            else:
+                condition &= Q(**{f"{name}__gte": value}) | Q(**{f"{name}__isnull": True})
+        return condition
+
+
+class StayCursorPagination(KeysetCursorPagination):
+    ordering = ("-check_in",)
+
+
+class ServiceRecordCursorPagination(KeysetCursorPagination):
+    ordering = ("-occurred_at",)
+
+    def bound(self, position, reverse):
+        # event_date é a data local de occurred_at: limitá-lo pelo cursor deixa
+        # o Postgres podar as partições mensais que ficam do outro lado
+        if self.ordering[0].lstrip("-") != "occurred_at":
+            return Q()
+        try:
+            day = timezone.localdate(position[0])
+        except OverflowError:  # cursor nos extremos de datetime
+            return Q()
+        if self.ordering[0].startswith("-") != reverse:
+            return Q(event_date__lte=day)
+        return Q(event_date__gte=day)
@@ -0,0 +1,34 @@
+import io
+
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela o FastJSONParser é o JSONParser do DRF
+    orjson = None
+
+# o orjson lê inteiros acima de 64 bits como float; o json do Python mantém int.
+# Todo dígito vira "0" e procura-se 19 seguidos (bem mais rápido que uma regex)
+DIGITS_AS_ZERO = bytes.maketrans(b"0123456789", b"0000000000")
+LONG_NUMBER = b"0" * 19
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser com orjson para corpos UTF-8. O orjson já recusa NaN/Infinity
+    (como o STRICT_JSON do DRF); erros de sintaxe e corpos com números muito
+    longos voltam para o parser do DRF, com o mesmo resultado e as mesmas
+    mensagens de sempre.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        if orjson is None or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if LONG_NUMBER not in body.translate(DIGITS_AS_ZERO):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
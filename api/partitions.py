@@ -0,0 +1,101 @@
+"""
+Partições mensais de ServiceRecord (tabela particionada por event_date na
+migração 0011): uma tabela `api_servicerecord_pYYYYMM` por mês mais a
+partição DEFAULT, que recebe o que cair fora dos meses criados.
+"""
+import datetime
+import gzip
+import os
+import re
+
+from django.db import connection, transaction
+
+from .models import ServiceRecord
+
+PARENT = ServiceRecord._meta.db_table
+DEFAULT = f"{PARENT}_default"
+NAME_PATTERN = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+
+def next_month(month):
+    return (month.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month):
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def monthly_partitions():
+    """{primeiro dia do mês: nome} das partições mensais anexadas."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [PARENT],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = NAME_PATTERN.match(name)
+        if match:
+            partitions[datetime.date(int(match[1]), int(match[2]), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+@transaction.atomic
+def create(month):
+    """
+    Cria a partição do mês. Linhas do mês que já caíram na DEFAULT são
+    movidas para ela antes do ATTACH (senão o Postgres recusa a partição).
+    """
+    start, end = month.replace(day=1), next_month(month)
+    name = partition_name(start)
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT} WHERE event_date >= %s AND event_date < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return name
+
+
+def ensure(start, months):
+    """Cria as partições que faltam de `start` até `months` meses depois; devolve os nomes criados."""
+    existing = monthly_partitions()
+    created = []
+    month = start.replace(day=1)
+    for _ in range(months + 1):
+        if month not in existing:
+            created.append(create(month))
+        month = next_month(month)
+    return created
+
+
+def dump(name, directory):
+    """Copia a partição para `<directory>/<name>.csv.gz` (CSV com cabeçalho)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.csv.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as file, connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", file)
+    return path
+
+
+def archive(month, directory=None, drop=False):
+    """
+    Desanexa a partição do mês (as linhas saem do ORM e da API) e,
+    opcionalmente, copia a tabela já desanexada para um .csv.gz e a apaga.
+    Tudo numa transação: nenhum serviço gravado entre a cópia e o DETACH fica
+    fora do arquivo, e se a cópia falhar a partição continua anexada. O
+    DETACH bloqueia ServiceRecord até o fim da cópia.
+    """
+    name = partition_name(month)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        path = dump(name, directory) if directory else None
+        if drop:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {name}")
+    return path
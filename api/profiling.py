@@ -0,0 +1,197 @@
+"""
+Profiling por amostragem das requisições (DOGDEX_PROFILING).
+
+Desligado (ENABLED False) o ProfilingMiddleware nem entra na pilha
+(MiddlewareNotUsed), então o custo é zero. Ligado, uma requisição é
+perfilada quando:
+
+- a rota está em ROUTES (padrão: timeline dos cães, hospedagens e
+  serviços) e cai na amostra de SAMPLE_RATE; ou
+- um usuário staff manda o header HEADER (`X-Dogdex-Profile: 1`), em
+  qualquer rota.
+
+MODE "cprofile" grava o pstats (`python -m pstats`, snakeviz); "sampling"
+amostra a pilha da thread a cada SAMPLE_INTERVAL_MS e grava stacks
+colapsadas (flamegraph.pl, speedscope); com o GIL trocando de thread a
+cada ~5 ms, serve para as requisições lentas. Os arquivos ficam num ring buffer
+em DIRECTORY com no máximo MAX_PROFILES perfis, servidos só para staff em
+/api/profiles/.
+"""
+import cProfile
+import json
+import logging
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.0,
+    # exports ficam de fora: o stream roda depois do middleware
+    "ROUTES": ("dog-timeline", "stay-list", "stay-detail", "service-record-list", "service-record-detail",
+               "service-record-bulk"),
+    "HEADER": "X-Dogdex-Profile",
+    "MODE": "cprofile",  # ou "sampling"
+    "SAMPLE_INTERVAL_MS": 1,
+    "DIRECTORY": None,  # padrão: <tmp>/dogdex-profiles
+    "MAX_PROFILES": 50,
+}
+EXTENSIONS = {"cprofile": ".prof", "sampling": ".collapsed"}
+NAME_PATTERN = re.compile(r"^\d{20}-[0-9a-f]{8}$")
+
+logger = logging.getLogger(__name__)
+
+# um perfil por vez no processo: o cProfile do 3.12+ não aceita dois ativos
+_busy = threading.Lock()
+
+
+def profiling_settings():
+    return {**DEFAULTS, **getattr(settings, "DOGDEX_PROFILING", {})}
+
+
+def directory():
+    return Path(profiling_settings()["DIRECTORY"] or Path(tempfile.gettempdir()) / "dogdex-profiles")
+
+
+def route_of(request):
+    try:
+        return resolve(request.path_info).view_name
+    except Resolver404:
+        return None
+
+
+class StackSampler(threading.Thread):
+    """Amostra a pilha de outra thread; `stacks` conta cada pilha colapsada."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id, self.interval = thread_id, interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+
+def save(meta, write):
+    """Grava o perfil e os metadados; descarta os mais antigos além de MAX_PROFILES."""
+    path = directory()
+    path.mkdir(parents=True, exist_ok=True)
+    name = f"{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"  # ordem = ordem de criação
+    write(path / f"{name}{EXTENSIONS[meta['mode']]}")
+    (path / f"{name}.json").write_text(json.dumps({"name": name, **meta}))
+    for old in sorted(path.glob("*.json"))[:-profiling_settings()["MAX_PROFILES"]]:
+        for file in path.glob(f"{old.stem}.*"):
+            file.unlink(missing_ok=True)  # outro worker pode ter apagado antes
+    return name
+
+
+def profiles():
+    """Metadados dos perfis guardados, do mais novo para o mais antigo."""
+    found = []
+    for path in sorted(directory().glob("*.json"), reverse=True):
+        try:
+            found.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return found
+
+
+def profile_file(name):
+    """(caminho, modo) do perfil `name`; LookupError se não existir."""
+    if NAME_PATTERN.match(name):
+        for mode, extension in EXTENSIONS.items():
+            path = directory() / f"{name}{extension}"
+            if path.exists():
+                return path, mode
+    raise LookupError(name)
+
+
+class ProfilingMiddleware:
+    """Coloque depois do AuthenticationMiddleware (o header só vale para staff)."""
+
+    def __init__(self, get_response):
+        options = profiling_settings()
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.options = options
+        self.routes = set(options["ROUTES"])
+
+    def trigger(self, request):
+        if request.headers.get(self.options["HEADER"]):
+            user = getattr(request, "user", None)
+            return "header" if user is not None and user.is_staff else None
+        rate = self.options["SAMPLE_RATE"]
+        if rate and random.random() < rate and (not self.routes or route_of(request) in self.routes):
+            return "sample"
+        return None
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None or not _busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profiled(request, trigger)
+        finally:
+            _busy.release()
+
+    def profiled(self, request, trigger):
+        mode = self.options["MODE"]
+        start = time.perf_counter()
+        if mode == "sampling":
+            profiler = StackSampler(threading.get_ident(), self.options["SAMPLE_INTERVAL_MS"] / 1000)
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+
+            def write(path):
+                path.write_text("".join(f"{stack} {count}\n" for stack, count in profiler.stacks.most_common()))
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            write = profiler.dump_stats
+        meta = {
+            "mode": mode,
+            "trigger": trigger,
+            "route": route_of(request),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "created_at": timezone.now().isoformat(),
+        }
+        try:
+            response["X-Dogdex-Profile-Id"] = save(meta, write)
+        except OSError:
+            logger.exception("Não foi possível gravar o perfil de %s.", meta["path"])
+        return response
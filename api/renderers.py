@@ -0,0 +1,63 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela o FastJSONRenderer é o JSONRenderer do DRF
+    orjson = None
+
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    Renderer usado só para negociar `?format=` nas exportações.
+
+    As linhas são escritas direto no StreamingHttpResponse (api/exports.py);
+    este render só é chamado para respostas de erro.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer com orjson, byte a byte igual ao do DRF na configuração
+    padrão (compacto, UTF-8, U+2028/U+2029 escapados).
+
+    dict/list/str/int/UUID saem direto do orjson; datetime, date, time e o
+    resto passam pelo `default` do encoder do DRF, então Decimal continua
+    virando número (float) e datetime UTC termina em "Z". Com indentação
+    (API navegável, `; indent=`) ou sem orjson instalado, usa o render do DRF.
+    Diferenças só em casos que o DRF já trata como erro (NaN vira null) ou
+    em floats com expoente ("1e-05" no json, "1e-5" no orjson). O que o
+    orjson recusa (ex.: inteiros acima de 64 bits) também vai para o DRF.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+               if orjson else 0)
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -0,0 +1,125 @@
+"""
+Schema OpenAPI pré-gerado.
+
+`manage.py generate_schema` grava o JSON em DOGDEX_SCHEMA["FILE"] no
+build/deploy (o arquivo é artefato do build, fora do git); `/openapi.json`
+serve esse arquivo com ETag e Cache-Control longo. Sem o arquivo, o schema é
+gerado uma única vez por processo, na primeira requisição. O Swagger UI em
+`/` é uma página estática que carrega o `/openapi.json` no navegador: não
+passa pelo SchemaView do drf_yasg nem pelo cache de página.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_GET
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+DEFAULTS = {
+    "FILE": settings.BASE_DIR / "openapi.json",
+    "MAX_AGE": 86400,
+}
+
+SWAGGER_UI = """<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <link rel="stylesheet" href="{css}">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="{bundle}"></script>
+  <script src="{preset}"></script>
+  <script>
+    SwaggerUIBundle({{
+      url: "{spec}",
+      dom_id: "#swagger-ui",
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: "StandaloneLayout",
+    }});
+  </script>
+</body>
+</html>
+"""
+
+INFO = openapi.Info(
+    title="Dogs API",
+    default_version="v1",
+    description="Documentação da API de Dogs",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contato@exemplo.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+    INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def schema_settings():
+    return {**DEFAULTS, **getattr(settings, "DOGDEX_SCHEMA", {})}
+
+
+def generate():
+    """Schema completo em JSON (bytes), igual ao de `/?format=openapi`, mas sem host fixo."""
+    # as views leem request.query_params ao montar o queryset; a requisição é só de fachada
+    request = APIView().initialize_request(APIRequestFactory().get("/?format=openapi"))
+    schema = schema_view.generator_class(INFO).get_schema(request=request, public=True)
+    schema.pop("host", None)  # o Swagger UI usa a origem da página
+    schema.pop("schemes", None)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def load():
+    """(conteúdo, etag) do arquivo gerado ou, sem ele, gerado uma vez neste processo."""
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                path = Path(schema_settings()["FILE"])
+                try:
+                    content = path.read_bytes()
+                except FileNotFoundError:
+                    content = generate()
+                _loaded.update(content=content, etag=hashlib.sha256(content).hexdigest()[:32])
+    return _loaded["content"], _loaded["etag"]
+
+
+@require_GET
+@etag(lambda request: load()[1])
+def schema_json(request):
+    content, _ = load()
+    response = HttpResponse(content, content_type="application/json")
+    patch_cache_control(response, public=True, max_age=schema_settings()["MAX_AGE"])
+    return response
+
+
+@require_GET
+def swagger_ui(request):
+    """Swagger UI (assets do drf_yasg) apontando para o `/openapi.json`."""
+    dist = "drf-yasg/swagger-ui-dist"
+    page = SWAGGER_UI.format(
+        title=INFO.title,
+        css=static(f"{dist}/swagger-ui.css"),
+        bundle=static(f"{dist}/swagger-ui-bundle.js"),
+        preset=static(f"{dist}/swagger-ui-standalone-preset.js"),
+        spec=reverse("schema-json"),
+    )
+    response = HttpResponse(page)
+    patch_cache_control(response, public=True, max_age=schema_settings()["MAX_AGE"])
+    return response
@@ -0,0 +1,59 @@
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .functions import normalized_value, search_normalized
+from .models import Dog, Owner, ServiceRecord
+
+
+def search_owners(text, limit):
+    query = normalized_value(text)
+    return list(
+        Owner.objects.alias(normalized_name=search_normalized("name"))
+        .filter(normalized_name__trigram_similar=query)
+        .annotate(score=TrigramSimilarity(search_normalized("name"), query))
+        .order_by("-score", "name")
+        .values("id", "name", "phone", "email", "score")[:limit]
+    )
+
+
+def search_dogs(text, limit):
+    query = normalized_value(text)
+    return list(
+        Dog.objects.alias(normalized_name=search_normalized("name"), normalized_breed=search_normalized("breed"))
+        .filter(Q(normalized_name__trigram_similar=query) | Q(normalized_breed__trigram_similar=query))
+        .annotate(
+            score=Greatest(
+                TrigramSimilarity(search_normalized("name"), query),
+                TrigramSimilarity(search_normalized("breed"), query),
+            ),
+            owner_name=F("owner__name"),
+        )
+        .order_by("-score", "name")
+        .values("id", "name", "breed", "is_active", "owner", "owner_name", "score")[:limit]
+    )
+
+
+def search_services(text, limit):
+    # notes é texto livre: word similarity acha o termo dentro da frase
+    query = normalized_value(text)
+    return list(
+        ServiceRecord.objects.alias(normalized_notes=search_normalized("notes"))
+        .filter(normalized_notes__trigram_word_similar=query)
+        .annotate(
+            score=TrigramWordSimilarity(query, search_normalized("notes")),
+            dog_name=F("dog__name"),
+            service_type_name=F("service_type__name"),
+        )
+        .order_by("-score", "-created_at")
+        .values("id", "dog", "dog_name", "service_type_name", "performed_at", "day", "notes", "score")[:limit]
+    )
+
+
+def search(text, limit):
+    """Busca por similaridade (pg_trgm) em tutores, cães e observações de serviços."""
+    return {
+        "owners": search_owners(text, limit),
+        "dogs": search_dogs(text, limit),
+        "services": search_services(text, limit),
+    }
@@ -1,10 +1,16 @@
+import uuid
+
 from django.contrib.auth.models import Group, User
 from rest_framework import serializers
 from django.shortcuts import get_object_or_404
-from api.models import Owner, Dog, Health, ServiceRecord, ServiceType, Stay
+from api.models import Owner, Dog, Health, ImportJob, ServiceRecord, ServiceType, Stay, validate_cpf
 from django.db import transaction, IntegrityError
+from django.db.models import F
 from rest_framework.exceptions import ValidationError
-from django.db.models import Sum
+from api import cache as response_cache
+from api import occupancy
+from api.expand import Expansion, ExpandableFieldsMixin
+from api.signals import services_created
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
@@ -18,29 +24,61 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
         fields = ['url', 'name']
 
 
-class OwnerSerializer(serializers.ModelSerializer):
+class OwnerSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "dogs": Expansion("api.serializers.DogSerializer", many=True, prefetch="dogs", queryset=Dog.objects.order_by("name")),
+    }
+
     class Meta:
         model = Owner
-        fields = '__all__'
+        exclude = ["phone_digits", "cpf_digits"]
 
 
-class HealthSerializer(serializers.ModelSerializer):
+class HealthSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Health
         fields = '__all__'
 
 
-class DogSerializer(serializers.ModelSerializer):
+class DogSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "owner": Expansion(OwnerSerializer, select_related="owner"),
+        "health": Expansion(HealthSerializer, select_related="health"),
+        "last_stay": Expansion(
+            "api.serializers.StaySerializer", prefetch="stays", to_attr="last_stays", first=True,
+            queryset=lambda: Stay.objects.select_related("dog__owner").order_by(F("check_in").desc(nulls_last=True), "-id")[:1],
+        ),
+    }
+
     class Meta:
         model = Dog
-        fields = '__all__'
+        exclude = ["revision"]
+
+
+# Serializers da busca de tutor no check-in (telefone/CPF)
+class HealthFlagsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Health
+        fields = ["has_vet", "castrated", "in_heat", "chronic_disease", "allergies", "special_recommendations"]
+
+
+class LookupDogSerializer(serializers.ModelSerializer):
+    health = HealthFlagsSerializer(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Dog
+        fields = ["id", "name", "size", "gender", "breed", "is_active", "health"]
+
+
+class OwnerLookupSerializer(OwnerSerializer):
+    dogs = LookupDogSerializer(source="active_dogs", many=True, read_only=True)
 
 
 # Serializer Para primeiro cadastro (payload completo do front: owner, dog e health)
 class DogNestedSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dog
-        exclude = ["owner"]  # setado no create
+        exclude = ["owner", "revision"]  # owner setado no create
 
 class HealthNestedSerializer(serializers.ModelSerializer):
     class Meta:
@@ -48,57 +86,107 @@ class HealthNestedSerializer(serializers.ModelSerializer):
         exclude = ["dog"]    # setado no create
 
 
+class OnboardingDogSerializer(DogNestedSerializer):
+    health = HealthNestedSerializer(required=False)
+
+
 class OwnerFullSerializer(serializers.ModelSerializer):
-    dog = DogNestedSerializer(write_only=True)
-    health = HealthNestedSerializer(write_only=True)
+    # `dog`/`health` (um cão) continuam aceitos; `dogs` traz vários, cada um com seu `health`
+    dog = DogNestedSerializer(write_only=True, required=False)
+    health = HealthNestedSerializer(write_only=True, required=False)
+    dogs = OnboardingDogSerializer(many=True, write_only=True, required=False)
 
     class Meta:
         model = Owner
         fields = [
             "id", "name", "phone", "email", "cpf", "address", "district",
-            "dog", "health"
+            "dog", "health", "dogs"
         ]
 
+    def validate(self, attrs):
+        if "health" in attrs and "dog" not in attrs:
+            raise ValidationError({"health": "Informe o cão desses dados de saúde."})
+        if "dog" in attrs:
+            attrs["dogs"] = [{**attrs.pop("dog"), "health": attrs.pop("health", {})}, *attrs.get("dogs", [])]
+        if not attrs.get("dogs"):
+            raise ValidationError({"dogs": "Informe ao menos um cão."})
+        return attrs
+
     @transaction.atomic
     def create(self, validated_data):
-        dog_data = validated_data.pop("dog")
-        health_data = validated_data.pop("health")
+        dogs_data = validated_data.pop("dogs")
 
         try:
             owner = Owner.objects.create(**validated_data)
         except IntegrityError as e:
             raise ValidationError({"cpf": "Já existe um tutor com este CPF."})
 
-        dog = Dog.objects.create(owner=owner, **dog_data)
-        Health.objects.create(dog=dog, **health_data)
-
+        # um INSERT por tabela; Health(dog=dog) também deixa dog.health em cache para a resposta
+        dogs, healths = [], []
+        for dog_data in dogs_data:
+            health_data = dog_data.pop("health", {})
+            dog = Dog(owner=owner, **dog_data)
+            dogs.append(dog)
+            healths.append(Health(dog=dog, **health_data))
+        Dog.objects.bulk_create(dogs)
+        Health.objects.bulk_create(healths)
+        response_cache.invalidate(Dog, Health)  # bulk_create não dispara os signals
+
+        owner.onboarded_dogs = dogs
         return owner
 
     def to_representation(self, instance):
-        # devolve tudo já aninhado, bom pro front
+        # devolve tudo já aninhado, bom pro front; logo após o create não consulta o banco
         data = super().to_representation(instance)
-        data["dog"] = DogNestedSerializer(instance.dogs.first()).data if instance.dogs.exists() else None
-        dog = instance.dogs.first() if instance.dogs.exists() else None
-
-        if dog:
-            try:
-                health = dog.health
-            except Health.DoesNotExist:
-                health = None
-        else:
-            health = None
-
-        data["health"] = HealthNestedSerializer(health).data if health else None
+        dogs = getattr(instance, "onboarded_dogs", None)
+        if dogs is None:
+            dogs = list(instance.dogs.select_related("health").order_by("id"))
+        data["dogs"] = OnboardingDogSerializer(dogs, many=True).data
+        # formato antigo (um cão): o primeiro da lista
+        first = data["dogs"][0] if data["dogs"] else None
+        data["dog"] = {key: value for key, value in first.items() if key != "health"} if first else None
+        data["health"] = first.get("health") if first else None
         return data
 
 
+# Importação em lote do cadastro (api/onboarding.py): uma linha da planilha
+class OwnerImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Owner
+        fields = ["name", "phone", "email", "cpf", "address", "district"]
+        extra_kwargs = {"cpf": {"validators": [validate_cpf]}}  # sem o de unicidade: CPF repetido reaproveita o tutor
+
+
+class OnboardingRowSerializer(serializers.Serializer):
+    owner = OwnerImportSerializer()
+    dog = DogNestedSerializer(required=False)
+    health = HealthNestedSerializer(required=False)
+
+    def validate(self, attrs):
+        if "health" in attrs and "dog" not in attrs:
+            raise ValidationError({"health": "Informe o cão para importar os dados de saúde."})
+        return attrs
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        exclude = ["checksum"]
+
+
 class ServiceTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceType
         fields = ["id", "name", "description", "base_price"]
 
 
-class StaySerializer(serializers.ModelSerializer):
+class StaySerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "dog": Expansion(DogSerializer, select_related="dog"),
+        "owner": Expansion(OwnerSerializer, select_related="owner"),
+    }
+    deferrable_fields = ("notes",)
+
     dog_name = serializers.CharField(source="dog.name", read_only=True)
     owner = serializers.UUIDField(source="dog.owner.id", read_only=True) # snapshot implícito
     total_with_services = serializers.SerializerMethodField()
@@ -107,24 +195,75 @@ class StaySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_total_with_services(self, obj):
-        # soma dos serviços relacionados + price_total da hospedagem
-        services_total = obj.services.aggregate(total=Sum('price'))['total'] or 0
-        return obj.price_total + services_total
+        # soma dos serviços relacionados (denormalizada em services_total) + price_total da hospedagem
+        return obj.price_total + obj.services_total
+
+    overlap_error = "O cão já tem uma hospedagem nesse período."
+    overlap_constraint = "api_stay_no_overlap"
+
+    def is_overlap(self, exc):
+        """IntegrityError da constraint de sobreposição (em corrida com outra gravação); FK, check etc. sobem."""
+        diag = getattr(exc.__cause__, "diag", None)
+        return getattr(diag, "constraint_name", None) == self.overlap_constraint
 
     def create(self, validated_data):
         dog = validated_data.get("dog")
         validated_data["owner"] = dog.owner
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as exc:
+            if not self.is_overlap(exc):
+                raise
+            raise ValidationError(self.overlap_error)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as exc:
+            if not self.is_overlap(exc):
+                raise
+            raise ValidationError(self.overlap_error)
 
     def validate(self, attrs):
         check_in = attrs.get("check_in") or getattr(self.instance, "check_in", None)
         check_out = attrs.get("check_out") or getattr(self.instance, "check_out", None)
         if check_in and check_out and check_out < check_in:
             raise serializers.ValidationError("check_out não pode ser anterior ao check_in.")
+        dog = attrs.get("dog") or getattr(self.instance, "dog", None)
+        if dog and check_in:
+            # consulta pelo índice GiST da constraint de sobreposição
+            overlapping = occupancy.overlapping(dog.pk, check_in, check_out)
+            if self.instance is not None:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            if overlapping.exists():
+                raise serializers.ValidationError(self.overlap_error)
         return attrs
 
 
-class ServiceRecordSerializer(serializers.ModelSerializer):
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve o pk em `context["preloaded"][Model]` quando o contexto traz os
+    objetos já carregados (cadastro em lote), sem uma query por linha.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return preloaded[uuid.UUID(str(data))]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError, AttributeError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class ServiceRecordSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    deferrable_fields = ("metadata", "notes")
+
     service_type_name = serializers.CharField(source="service_type.name", read_only=True)
 
     dog_name = serializers.CharField(source="dog.name", read_only=True)
@@ -137,9 +276,10 @@ class ServiceRecordSerializer(serializers.ModelSerializer):
             "id", "dog", "dog_name", "owner", "owner_name",
             "service_type", "service_type_name",
             "performed_at", "day", "stay",
-            "price", "currency", "metadata", "notes", "created_at"
+            "price", "currency", "metadata", "notes", "created_at", "updated_at"
         ]
-        read_only_fields = ["created_at"]
+        read_only_fields = ["created_at", "updated_at"]
+        extra_kwargs = {"owner": {"required": False}}  # snapshot preenchido a partir do cão
 
     def validate(self, attrs):
         performed_at = attrs.get("performed_at")
@@ -149,4 +289,77 @@ class ServiceRecordSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Informe performed_at (pontual) ou day (diário).")
         if performed_at and day:
             raise serializers.ValidationError("Use apenas um: performed_at OU day.")
-        return attrs
\ No newline at end of file
+        dog = attrs.get("dog") or getattr(self.instance, "dog", None)
+        stay = attrs.get("stay")
+        if stay and dog and stay.dog_id != dog.pk:
+            raise serializers.ValidationError("O ServiceRecord deve referenciar a mesma dog de Stay.")
+        return attrs
+
+
+class ServiceRecordBulkSerializer(serializers.Serializer):
+    """
+    Cadastro em lote de ServiceRecord (ex.: diárias da creche).
+
+    Cães, tipos de serviço e hospedagens referenciados são carregados com uma
+    query por modelo; cada linha passa pelas validações do
+    ServiceRecordSerializer e as válidas entram num único bulk_create.
+    Com `atomic`, qualquer erro cancela o lote inteiro.
+    """
+    max_records = 1000
+
+    records = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=max_records)
+    atomic = serializers.BooleanField(default=False)
+
+    def preload(self, records):
+        def ids(key):
+            values = set()
+            for row in records:
+                try:
+                    values.add(uuid.UUID(str(row[key])))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            return values
+
+        return {
+            Dog: Dog.objects.select_related("owner").in_bulk(ids("dog")),
+            Owner: Owner.objects.in_bulk(ids("owner")),
+            ServiceType: ServiceType.objects.in_bulk(ids("service_type")),
+            Stay: Stay.objects.in_bulk(ids("stay")),
+        }
+
+    def create(self, validated_data):
+        records = validated_data["records"]
+        context = {**self.context, "preloaded": self.preload(records)}
+
+        instances, errors = [], []
+        for index, row in enumerate(records):
+            serializer = ServiceRecordSerializer(data=row, context=context)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+            instance = ServiceRecord(**serializer.validated_data)
+            instance.fill_defaults()
+            instances.append(instance)
+
+        if errors and validated_data["atomic"]:
+            return [], errors
+
+        with transaction.atomic():
+            created = ServiceRecord.objects.bulk_create(instances)
+            services_created(created)  # bulk_create não dispara post_save
+        return created, errors
+
+
+class BillingLineSerializer(serializers.Serializer):
+    service_type = serializers.UUIDField(allow_null=True)  # nulo = hospedagem
+    service_type_name = serializers.CharField()
+    currency = serializers.CharField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class BillingSummarySerializer(serializers.Serializer):
+    owner = serializers.UUIDField(required=False)
+    month = serializers.DateField(format="%Y-%m")
+    lines = BillingLineSerializer(many=True)
+    totals = serializers.DictField(child=serializers.DecimalField(max_digits=12, decimal_places=2))
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import billing
+from . import cache as response_cache
+from . import events
+from . import metrics
+from .models import Dog, Health, Owner, ServiceRecord, ServiceType, Stay, Tombstone
+
+SERVICE_TRACKED_FIELDS = ("dog_id", "stay_id", *billing.SERVICE_FIELDS)
+STAY_TRACKED_FIELDS = ("dog_id", "check_out", *billing.STAY_FIELDS)
+# nome de cada model no delta de /api/sync/ (api/sync.py) e nos Tombstones
+SYNC_ENTITIES = {Owner: "owners", Dog: "dogs", Health: "healths", Stay: "stays", ServiceRecord: "services"}
+
+
+def loaded_values(instance, fields):
+    """Valores de `fields` como estão no banco (antes da alteração em memória)."""
+    loaded = getattr(instance, "_loaded", {})
+    missing = [name for name in fields if name not in loaded]
+    if missing and not instance._state.adding:
+        loaded.update(type(instance).objects.filter(pk=instance.pk).values(*missing).first() or {})
+    return {name: loaded.get(name) for name in fields}
+
+
+def current_values(instance, fields):
+    return {name: getattr(instance, name) for name in fields}
+
+
+def add_to_services_total(deltas):
+    """Aplica `{stay_id: delta}` em Stay.services_total com UPDATE atômico."""
+    changed = False
+    for stay_id, delta in deltas.items():
+        if stay_id is not None and delta:
+            Stay.objects.filter(pk=stay_id).update(
+                services_total=F("services_total") + delta, updated_at=timezone.now(),
+            )
+            changed = True
+    if changed:
+        response_cache.invalidate(Stay)
+
+
+def services_total_deltas(old=None, new=None):
+    deltas = defaultdict(Decimal)
+    if old:
+        deltas[old["stay_id"]] -= old["price"] or 0
+    if new:
+        deltas[new["stay_id"]] += new["price"] or 0
+    return deltas
+
+
+def remember_previous(instance, fields):
+    instance._previous = None if instance._state.adding else loaded_values(instance, fields)
+
+
+def remember_loaded(instance, values):
+    instance._loaded = {**getattr(instance, "_loaded", {}), **values}
+
+
+def bump_dog_revisions(*dog_ids):
+    """Marca mudança nas linhas relacionadas dos cães (muda o ETag de detalhe/timeline)."""
+    dog_ids = {dog_id for dog_id in dog_ids if dog_id is not None}
+    if dog_ids:
+        Dog.objects.filter(pk__in=dog_ids).update(revision=F("revision") + 1)
+
+
+def dog_ids_changed(instance, previous=None):
+    return (instance.dog_id, (previous or {}).get("dog_id"))
+
+
+def services_created(instances):
+    """Mesmo efeito do post_save para ServiceRecords criados via bulk_create."""
+    totals, changes = defaultdict(Decimal), None
+    for instance in instances:
+        current = current_values(instance, SERVICE_TRACKED_FIELDS)
+        totals[current["stay_id"]] += current["price"] or 0
+        changes = billing.deltas(billing.service_entry, new=current, into=changes)
+        remember_loaded(instance, current)
+    add_to_services_total(totals)
+    billing.apply(changes or {})
+    bump_dog_revisions(*(instance.dog_id for instance in instances))
+    events.publish(*(events.service_event("created", instance) for instance in instances))
+    response_cache.invalidate(ServiceRecord)
+
+
+@receiver(pre_save, sender=ServiceRecord)
+def service_record_pre_save(sender, instance, raw, **kwargs):
+    remember_previous(instance, SERVICE_TRACKED_FIELDS)
+
+
+@receiver(post_save, sender=ServiceRecord)
+def service_record_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous", None)
+    current = current_values(instance, SERVICE_TRACKED_FIELDS)
+    add_to_services_total(services_total_deltas(previous, current))
+    billing.apply(billing.deltas(billing.service_entry, previous, current))
+    bump_dog_revisions(*dog_ids_changed(instance, previous))
+    events.publish(events.service_event("created" if created else "updated", instance))
+    remember_loaded(instance, current)
+
+
+@receiver(post_delete, sender=ServiceRecord)
+def service_record_deleted(sender, instance, **kwargs):
+    previous = loaded_values(instance, SERVICE_TRACKED_FIELDS)
+    add_to_services_total(services_total_deltas(old=previous))
+    billing.apply(billing.deltas(billing.service_entry, old=previous))
+    bump_dog_revisions(*dog_ids_changed(instance, previous))
+    events.publish(events.service_event("deleted", instance))
+
+
+@receiver(pre_save, sender=Stay)
+def stay_pre_save(sender, instance, raw, **kwargs):
+    remember_previous(instance, STAY_TRACKED_FIELDS)
+
+
+@receiver(post_save, sender=Stay)
+def stay_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous", None)
+    current = current_values(instance, STAY_TRACKED_FIELDS)
+    billing.apply(billing.deltas(billing.stay_entry, previous, current))
+    bump_dog_revisions(*dog_ids_changed(instance, previous))
+    events.publish(events.stay_event(stay_action(created, previous, current), instance))
+    remember_loaded(instance, current)
+
+
+def stay_action(created, previous, current):
+    if created:
+        return "created"
+    if previous and previous["check_out"] is None and current["check_out"] is not None:
+        return "closed"  # check-out registrado
+    return "updated"
+
+
+@receiver(pre_delete, sender=Stay)
+def stay_pre_delete(sender, instance, **kwargs):
+    # o SET_NULL do Django não toca updated_at: sem isso o /api/sync/ nunca reenvia esses serviços
+    instance.services.update(stay=None, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Stay)
+def stay_deleted(sender, instance, **kwargs):
+    previous = loaded_values(instance, STAY_TRACKED_FIELDS)
+    billing.apply(billing.deltas(billing.stay_entry, old=previous))
+    bump_dog_revisions(*dog_ids_changed(instance, previous))
+    events.publish(events.stay_event("deleted", instance))
+
+
+@receiver(post_save, sender=Health)
+@receiver(post_delete, sender=Health)
+def health_changed(sender, instance, **kwargs):
+    if not kwargs.get("raw"):
+        bump_dog_revisions(instance.dog_id)
+
+
+@receiver(pre_save, sender=ServiceType)
+def service_type_pre_save(sender, instance, raw, **kwargs):
+    remember_previous(instance, ("name",))
+
+
+@receiver(post_save, sender=ServiceType)
+def service_type_saved(sender, instance, created, raw, **kwargs):
+    # a timeline mostra service_type_name: renomear muda o ETag dos cães com serviços desse tipo
+    previous = getattr(instance, "_previous", None)
+    if raw or not previous or previous["name"] == instance.name:
+        return
+    Dog.objects.filter(
+        pk__in=ServiceRecord.objects.filter(service_type=instance).values("dog_id"),
+    ).update(revision=F("revision") + 1)
+    remember_loaded(instance, {"name": instance.name})
+
+
+@receiver(pre_save, sender=Dog)
+def dog_pre_save(sender, instance, raw, **kwargs):
+    remember_previous(instance, ("is_active",))
+
+
+@receiver(post_save, sender=Dog)
+def dog_saved(sender, instance, created, raw, **kwargs):
+    # desativar o cão (soft delete) some com ele do sync; reativar volta a enviá-lo
+    previous = getattr(instance, "_previous", None)
+    if raw or not previous or previous["is_active"] == instance.is_active:
+        return
+    if instance.is_active:
+        Tombstone.objects.filter(entity=SYNC_ENTITIES[Dog], object_id=instance.pk).delete()
+        # saúde, hospedagens e serviços ficaram fora do sync enquanto o cão estava desativado
+        now = timezone.now()
+        for related in (Health.objects, Stay.objects, ServiceRecord.objects):
+            related.filter(dog=instance).update(updated_at=now)
+    else:
+        Tombstone.objects.create(entity=SYNC_ENTITIES[Dog], object_id=instance.pk)
+    remember_loaded(instance, {"is_active": instance.is_active})
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(entity=SYNC_ENTITIES[sender], object_id=instance.pk)
+
+
+def invalidate_response_cache(sender, **kwargs):
+    response_cache.invalidate(sender)
+
+
+for model in (Owner, Dog, Health, ServiceType, Stay, ServiceRecord):
+    post_save.connect(invalidate_response_cache, sender=model, dispatch_uid=f"response-cache-save-{model.__name__}")
+    post_delete.connect(invalidate_response_cache, sender=model, dispatch_uid=f"response-cache-delete-{model.__name__}")
+
+for model in SYNC_ENTITIES:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"sync-tombstone-{model.__name__}")
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # contagem/tempo de queries por requisição do MetricsMiddleware (api/metrics.py)
+    metrics.instrument(connection)
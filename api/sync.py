@@ -0,0 +1,143 @@
+"""
+Delta de cadastros para os tablets do canil (`GET /api/sync/?since=<token>`).
+
+Cada rodada lê, por entidade e em ordem (tutores, cães, saúde, hospedagens,
+serviços, remoções), as linhas com `updated_at` depois do `since` e até o
+instante em que a rodada começou, paginando por (updated_at, id). O token
+guarda a posição; ao fim da rodada o novo `since` recua DOGDEX_SYNC
+["OVERLAP_SECONDS"] para pegar transações que gravaram antes e commitaram
+depois, então algumas linhas podem vir repetidas (o cliente faz upsert).
+
+Cães desativados saem do delta e viram remoção, levando junto a saúde, as
+hospedagens e os serviços deles (reativar o cão os reenvia); tokens mais
+velhos que a retenção dos Tombstones exigem sincronização completa (sem
+`since`).
+"""
+import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Dog, Health, Owner, ServiceRecord, Stay, Tombstone
+from .serializers import DogSerializer, HealthSerializer, OwnerSerializer, ServiceRecordSerializer, StaySerializer
+from .signals import SYNC_ENTITIES
+
+DEFAULTS = {
+    "PAGE_SIZE": 500,
+    "MAX_PAGE_SIZE": 2000,
+    "OVERLAP_SECONDS": 60,
+    "TOMBSTONE_DAYS": 30,  # retenção das remoções (manage.py prune_tombstones)
+}
+SALT = "dogdex.sync"
+
+# (entidade, queryset, serializer); a ordem deixa os pais antes dos filhos. Os filhos de cães
+# desativados ficam de fora junto com o cão (o tablet recebe só o Tombstone do cão)
+SOURCES = (
+    (SYNC_ENTITIES[Owner], Owner.objects.all, OwnerSerializer),
+    (SYNC_ENTITIES[Dog], lambda: Dog.objects.filter(is_active=True), DogSerializer),
+    (SYNC_ENTITIES[Health], lambda: Health.objects.filter(dog__is_active=True), HealthSerializer),
+    (SYNC_ENTITIES[Stay], lambda: Stay.objects.filter(dog__is_active=True).select_related("dog__owner"),
+     StaySerializer),
+    # o delta é por updated_at, sem relação com event_date: um serviço antigo editado hoje
+    # também entra, então não há limite de partição a aplicar aqui
+    (SYNC_ENTITIES[ServiceRecord],
+     lambda: ServiceRecord.objects.filter(dog__is_active=True).select_related("dog", "owner", "service_type"),
+     ServiceRecordSerializer),
+)
+DELETED = len(SOURCES)  # posição das remoções na rodada
+
+
+class TokenError(ValueError):
+    pass
+
+
+class TokenExpired(TokenError):
+    pass
+
+
+def sync_settings():
+    return {**DEFAULTS, **getattr(settings, "DOGDEX_SYNC", {})}
+
+
+def encode(state):
+    return signing.dumps(state, salt=SALT, compress=True)
+
+
+def decode(token):
+    try:
+        state = signing.loads(token, salt=SALT)
+        return {
+            "since": parse_datetime(state["since"]) if state["since"] else None,
+            "until": parse_datetime(state["until"]) if state.get("until") else None,
+            "step": int(state.get("step", 0)),
+            # id como texto: uuid nas entidades, inteiro nos Tombstones
+            "after": (parse_datetime(state["after"][0]), str(state["after"][1])) if state.get("after") else None,
+        }
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise TokenError("Token inválido.")
+
+
+def keyset(queryset, field, since, after, until):
+    """Linhas com (field, id) depois de `after` (ou field > since) e field <= until, em ordem."""
+    if after is not None:
+        queryset = queryset.filter(Q(**{f"{field}__gt": after[0]}) | Q(**{field: after[0], "id__gt": after[1]}))
+    elif since is not None:
+        queryset = queryset.filter(**{f"{field}__gt": since})
+    return queryset.filter(**{f"{field}__lte": until}).order_by(field, "id")
+
+
+def changes(token=None, limit=None):
+    """Uma página do delta: {"changes", "deleted", "next", "has_more"}."""
+    options = sync_settings()
+    limit = min(limit or options["PAGE_SIZE"], options["MAX_PAGE_SIZE"])
+    now = timezone.now()
+    if token:
+        state = decode(token)
+        if state["since"] and state["since"] < now - datetime.timedelta(days=options["TOMBSTONE_DAYS"]):
+            raise TokenExpired("Token expirado; sincronize tudo de novo (sem `since`).")
+    else:
+        state = {"since": None, "until": None, "step": 0, "after": None}
+    since, until = state["since"], state["until"] or now
+    step, after = state["step"], state["after"]
+
+    data = {"changes": {name: [] for name, *_ in SOURCES}, "deleted": {name: [] for name, *_ in SOURCES}}
+    remaining = limit
+    while step <= DELETED and remaining:
+        if step < DELETED:
+            name, queryset, serializer_class = SOURCES[step]
+            rows = list(keyset(queryset(), "updated_at", since, after, until)[:remaining + 1])
+            data["changes"][name] = serializer_class(rows[:remaining], many=True).data
+            position = [(row.updated_at, row.pk) for row in rows[:remaining]]
+        else:
+            # na sincronização completa não há o que remover
+            rows = [] if since is None else list(keyset(Tombstone.objects.all(), "deleted_at", since, after, until)
+                                                 .values_list("deleted_at", "id", "entity", "object_id")[:remaining + 1])
+            for _, _, entity, object_id in rows[:remaining]:
+                data["deleted"][entity].append(object_id)
+            position = [(deleted_at, pk) for deleted_at, pk, *_ in rows[:remaining]]
+        if len(rows) > remaining:  # página cheia no meio da entidade
+            after = position[-1]
+            remaining = 0
+            break
+        remaining -= len(rows)
+        step, after = step + 1, None
+
+    if step > DELETED:
+        # rodada completa: próximo delta recua um pouco para não perder commits atrasados
+        next_since = until - datetime.timedelta(seconds=options["OVERLAP_SECONDS"])
+        if since is not None:
+            next_since = max(next_since, since)
+        data["next"] = encode({"since": next_since.isoformat()})
+        data["has_more"] = False
+    else:
+        data["next"] = encode({
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "step": step,
+            "after": [after[0].isoformat(), str(after[1])] if after else None,
+        })
+        data["has_more"] = True
+    return data
@@ -1,3 +1,515 @@
-from django.test import TestCase
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import DatabaseError, IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api import billing, onboarding, sync
+from api.models import BillingRollup, Dog, Health, ImportJob, Owner, ServiceRecord, ServiceType, Stay, Tombstone
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import ServiceRecordSerializer, StaySerializer
+
+
+class DogdexTestCase(TestCase):
+    """Base com um tutor, cães com saúde, hospedagens e serviços."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "senha")
+        cls.bath = ServiceType.objects.create(name="Banho", base_price=Decimal("50.00"))
+        cls.owner = Owner.objects.create(name="Ana", phone="(11) 98888-7777", cpf="111.444.777-35")
+        cls.dogs = []
+        start = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+        for index in range(3):
+            dog = Dog.objects.create(owner=cls.owner, name=f"Rex {index}", gender="M", size="P")
+            Health.objects.create(dog=dog, has_vet=True)
+            for week in range(2):
+                check_in = start + datetime.timedelta(weeks=week)
+                stay = Stay.objects.create(dog=dog, owner=cls.owner, check_in=check_in,
+                                           check_out=check_in + datetime.timedelta(days=2))
+                ServiceRecord.objects.create(dog=dog, service_type=cls.bath, stay=stay,
+                                             performed_at=check_in + datetime.timedelta(hours=3))
+                ServiceRecord.objects.create(dog=dog, service_type=cls.bath, day=check_in.date())
+            cls.dogs.append(dog)
+        cls.dog = cls.dogs[0]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self):
+        self.client.force_authenticate(self.admin)
+
+
+class QueryBudgetTests(DogdexTestCase):
+    """Número de queries por endpoint, independente de quantas linhas a página tem."""
+
+    def test_dog_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/dogs/")
+        self.assertEqual(len(response.json()), 3)
+
+    def test_dog_list_expanded(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/dogs/", {"expand": "owner,health"})
+        self.assertEqual(response.json()[0]["owner"]["name"], "Ana")
+
+    def test_dog_detail(self):
+        # ETag + cão com tutor
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/dogs/{self.dog.pk}/")
+        self.assertEqual(response.json()["owner"]["name"], "Ana")
+
+    def test_dog_timeline(self):
+        # ETag + cão + UNION ALL
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/dogs/{self.dog.pk}/timeline/")
+        self.assertEqual(len(response.json()["results"]), 6)
+
+    def test_owner_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/owners/{self.owner.pk}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_stay_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/stays/")
+        self.assertEqual(len(response.json()["results"]), 6)
+
+    def test_service_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/services/")
+        self.assertEqual(len(response.json()["results"]), 12)
+
+    def test_owner_lookup(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/owners/lookup/", {"cpf": "11144477735"})
+        self.assertEqual(len(response.json()[0]["dogs"]), 3)
+
+
+class SignalTests(DogdexTestCase):
+
+    def test_services_total_follows_service_changes(self):
+        stay = self.dog.stays.order_by("check_in").first()
+        self.assertEqual(stay.services_total, Decimal("50.00"))
+
+        service = ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, stay=stay,
+                                               performed_at=stay.check_in, price=Decimal("20.00"))
+        stay.refresh_from_db()
+        self.assertEqual(stay.services_total, Decimal("70.00"))
+
+        service.price = Decimal("30.00")
+        service.save()
+        stay.refresh_from_db()
+        self.assertEqual(stay.services_total, Decimal("80.00"))
+
+        service.delete()
+        stay.refresh_from_db()
+        self.assertEqual(stay.services_total, Decimal("50.00"))
+
+    def test_related_changes_bump_dog_revision(self):
+        revision = Dog.objects.get(pk=self.dog.pk).revision
+        ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, day=datetime.date(2025, 4, 1))
+        self.assertEqual(Dog.objects.get(pk=self.dog.pk).revision, revision + 1)
+
+        self.dog.health.allergies = "Frango"
+        self.dog.health.save()
+        self.assertEqual(Dog.objects.get(pk=self.dog.pk).revision, revision + 2)
+
+        self.bath.name = "Banho e tosa"
+        self.bath.save()
+        self.assertEqual(Dog.objects.get(pk=self.dog.pk).revision, revision + 3)
+
+    def test_delete_records_tombstone(self):
+        service = self.dog.services.first()
+        pk = service.pk
+        service.delete()
+        self.assertTrue(Tombstone.objects.filter(entity="services", object_id=pk).exists())
+
+    def test_deactivating_dog_records_tombstone(self):
+        self.dog.is_active = False
+        self.dog.save()
+        self.assertTrue(Tombstone.objects.filter(entity="dogs", object_id=self.dog.pk).exists())
+
+        self.dog.is_active = True
+        self.dog.save()
+        self.assertFalse(Tombstone.objects.filter(entity="dogs", object_id=self.dog.pk).exists())
+
+    def test_deleting_stay_touches_its_services(self):
+        stay = self.dog.stays.first()
+        service = stay.services.get()
+        before = timezone.now()
+        stay.delete()
+        service.refresh_from_db()
+        self.assertIsNone(service.stay_id)
+        self.assertGreaterEqual(service.updated_at, before)
+
+
+class KeysetPaginationTests(DogdexTestCase):
+
+    def test_pages_cover_every_row_once(self):
+        # occurred_at repetido: o desempate pelo id não pode pular nem repetir linhas
+        moment = timezone.make_aware(datetime.datetime(2025, 5, 1, 10))
+        for _ in range(5):
+            ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, performed_at=moment)
+        expected = [str(pk) for pk in ServiceRecord.objects.order_by("-occurred_at", "-id").values_list("pk", flat=True)]
+
+        seen, url, pages = [], "/api/services/?page_size=4", []
+        while url:
+            page = self.client.get(url).json()
+            pages.append(page)
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, expected)
+
+        previous = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual(previous["results"], pages[-2]["results"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/services/", {"cursor": "lixo"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_timeline_pages(self):
+        url = f"/api/dogs/{self.dog.pk}/timeline/?limit=4"
+        first = self.client.get(url).json()
+        second = self.client.get(first["next"]).json()
+        self.assertIsNone(second["next"])
+        full = self.client.get(f"/api/dogs/{self.dog.pk}/timeline/").json()["results"]
+        self.assertEqual(first["results"] + second["results"], full)
+
+
+class ConditionalGetTests(DogdexTestCase):
+
+    def test_not_modified_until_dog_changes(self):
+        url = f"/api/dogs/{self.dog.pk}/"
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, day=datetime.date(2025, 4, 1))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_timeline_shares_dog_etag(self):
+        etag = self.client.get(f"/api/dogs/{self.dog.pk}/")["ETag"]
+        response = self.client.get(f"/api/dogs/{self.dog.pk}/timeline/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_dog(self):
+        self.assertEqual(self.client.get("/api/dogs/nao-e-uuid/").status_code, 404)
+
+    def test_schema_etag(self):
+        response = self.client.get("/openapi.json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("/dogs/", response.json()["paths"])
+
+        response = self.client.get("/openapi.json", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "dogdex-tests"}},
+    DOGDEX_RESPONSE_CACHE={"ENABLED": True},
+)
+class ResponseCacheTests(DogdexTestCase):
+
+    def test_hit_and_invalidation(self):
+        self.client.get("/api/dogs/")
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/dogs/")
+        self.assertEqual(len(cached.data), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Dog.objects.create(owner=self.owner, name="Nova", gender="F", size="M")
+        self.assertEqual(len(self.client.get("/api/dogs/").data), 4)
+
+    def test_key_varies_with_permissions(self):
+        self.client.get("/api/owners/")
+        self.login()
+        with self.assertNumQueries(1):  # não serve a resposta guardada para o anônimo
+            self.client.get("/api/owners/")
+
+
+class SyncTests(DogdexTestCase):
+
+    def sync(self, **params):
+        self.login()
+        response = self.client.get("/api/sync/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    @override_settings(DOGDEX_SYNC={"OVERLAP_SECONDS": 0})
+    def test_full_then_delta(self):
+        full = self.sync(limit=2000)
+        self.assertFalse(full["has_more"])
+        self.assertEqual(len(full["changes"]["services"]), 12)
+        self.assertEqual(len(full["changes"]["dogs"]), 3)
+
+        service = self.dog.services.first()
+        pk = service.pk
+        service.delete()
+        dog = self.dogs[1]
+        dog.name = "Thor"
+        dog.save()
+        delta = self.sync(since=full["next"])
+        self.assertEqual([row["name"] for row in delta["changes"]["dogs"]], ["Thor"])
+        self.assertEqual(delta["deleted"]["services"], [str(pk)])
+
+    def test_pages_resume_from_token(self):
+        first = self.sync(limit=5)
+        self.assertTrue(first["has_more"])
+        seen = sum(len(rows) for rows in first["changes"].values())
+        token = first["next"]
+        while True:
+            page = self.sync(since=token, limit=5)
+            seen += sum(len(rows) for rows in page["changes"].values())
+            token = page["next"]
+            if not page["has_more"]:
+                break
+        # 1 tutor, 3 cães, 3 saúdes, 6 hospedagens, 12 serviços
+        self.assertEqual(seen, 25)
+
+    @override_settings(DOGDEX_SYNC={"OVERLAP_SECONDS": 0})
+    def test_inactive_dog_children_follow_the_dog(self):
+        self.dog.is_active = False
+        self.dog.save()
+        full = self.sync(limit=2000)
+        dog_ids = {row["id"] for row in full["changes"]["dogs"]}
+        for name in ("healths", "stays", "services"):
+            self.assertTrue(full["changes"][name])
+            self.assertTrue({row["dog"] for row in full["changes"][name]} <= dog_ids, name)
+
+        self.dog.is_active = True
+        self.dog.save()
+        delta = self.sync(since=full["next"])
+        self.assertEqual(len(delta["changes"]["stays"]), 2)
+        self.assertEqual(len(delta["changes"]["services"]), 4)
+        self.assertEqual(len(delta["changes"]["healths"]), 1)
+
+    def test_invalid_and_expired_tokens(self):
+        self.login()
+        self.assertEqual(self.client.get("/api/sync/", {"since": "lixo"}).status_code, 400)
+        old = timezone.now() - datetime.timedelta(days=sync.sync_settings()["TOMBSTONE_DAYS"] + 1)
+        token = sync.encode({"since": old.isoformat()})
+        self.assertEqual(self.client.get("/api/sync/", {"since": token}).status_code, 410)
+
+
+class BillingRollupTests(DogdexTestCase):
+    """O rollup mantido pelos signals bate com o recálculo a partir das tabelas brutas."""
+    MARCH = datetime.date(2025, 3, 1)
+    MAY = datetime.date(2025, 5, 1)
+
+    def test_incremental_matches_rebuild(self):
+        service = self.dog.services.filter(day__isnull=False).first()
+        service.price = Decimal("80.00")
+        service.save()
+        ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, day=datetime.date(2025, 4, 10))
+        self.dog.stays.order_by("check_in").first().delete()
+        self.assertEqual(billing.differences(self.MARCH, self.MAY), {})
+
+        incremental = billing.stored(self.MARCH, self.MAY)
+        billing.rebuild(self.MARCH, self.MAY)
+        self.assertEqual(billing.stored(self.MARCH, self.MAY), incremental)
+
+    @override_settings(TIME_ZONE="America/Sao_Paulo")
+    def test_day_only_service_counts_in_its_own_month(self):
+        # 2025-05-01 00:00 em São Paulo ainda é 30/04 em UTC
+        ServiceRecord.objects.create(dog=self.dog, service_type=self.bath, day=self.MAY)
+        rollup = BillingRollup.objects.get(month=self.MAY, service_type=self.bath)
+        self.assertEqual((rollup.total, rollup.count), (Decimal("50.00"), 1))
+        self.assertEqual(billing.differences(self.MARCH, self.MAY), {})
+
+    def test_emptied_rows_are_removed(self):
+        grooming = ServiceType.objects.create(name="Tosa", base_price=Decimal("70.00"))
+        service = ServiceRecord.objects.create(dog=self.dog, service_type=grooming, day=self.MAY)
+        self.assertTrue(BillingRollup.objects.filter(service_type=grooming).exists())
+
+        service.delete()
+        self.assertFalse(BillingRollup.objects.filter(service_type=grooming).exists())
+        grooming.delete()
+
+
+class ServiceBulkTests(DogdexTestCase):
+    url = "/api/services/bulk/"
+
+    def record(self, **extra):
+        return {"dog": str(self.dog.pk), "service_type": str(self.bath.pk), "day": "2025-04-01", **extra}
+
+    def test_valid_rows_are_saved_and_errors_returned_by_index(self):
+        self.login()
+        before = ServiceRecord.objects.count()
+        records = [self.record(), self.record(dog=str(uuid.uuid4())), self.record(day=None, performed_at=None),
+                   self.record(day="2025-04-02")]
+        response = self.client.post(self.url, {"records": records}, format="json")
+        self.assertEqual(response.status_code, 207, response.content)
+        self.assertEqual(len(response.json()["created"]), 2)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1, 2])
+        self.assertEqual(ServiceRecord.objects.count(), before + 2)
+        # bulk_create não dispara post_save: o rollup vem de services_created
+        self.assertEqual(billing.differences(datetime.date(2025, 4, 1), datetime.date(2025, 4, 1)), {})
+
+    def test_all_valid(self):
+        self.login()
+        response = self.client.post(self.url, [self.record(), self.record(price="10.00")], format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([row["price"] for row in response.json()["created"]], ["50.00", "10.00"])
+
+    def test_atomic_batch_saves_nothing_on_error(self):
+        self.login()
+        before = ServiceRecord.objects.count()
+        response = self.client.post(f"{self.url}?atomic=true", [self.record(), self.record(dog="x")], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1])
+        self.assertEqual(ServiceRecord.objects.count(), before)
+
+    def test_requires_permission(self):
+        self.assertEqual(self.client.post(self.url, [self.record()], format="json").status_code, 403)
+
+
+class StayOverlapTests(DogdexTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login()
+        stay = self.dog.stays.order_by("check_in").first()
+        self.data = {"dog": str(self.dog.pk), "owner": str(self.owner.pk),
+                     "check_in": (stay.check_in + datetime.timedelta(days=1)).isoformat(),
+                     "check_out": (stay.check_out + datetime.timedelta(days=1)).isoformat()}
+
+    def test_overlapping_stay(self):
+        before = Stay.objects.count()
+        response = self.client.post("/api/stays/", self.data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["non_field_errors"], [StaySerializer.overlap_error])
+        self.assertEqual(Stay.objects.count(), before)
+
+    def test_constraint_violation_is_a_400(self):
+        # outra gravação concorrente: a checagem do validate não vê a hospedagem, a constraint vê
+        with mock.patch("api.serializers.occupancy.overlapping", return_value=Stay.objects.none()):
+            response = self.client.post("/api/stays/", self.data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [StaySerializer.overlap_error])
+
+    def test_other_integrity_errors_are_not_overlaps(self):
+        self.assertFalse(StaySerializer().is_overlap(IntegrityError("violates foreign key constraint")))
+
+
+class JSONRendererTests(DogdexTestCase):
+    """FastJSONRenderer/FastJSONParser (orjson) têm a mesma saída do JSONRenderer/JSONParser do DRF."""
+
+    def payloads(self):
+        services = ServiceRecordSerializer(ServiceRecord.objects.select_related("dog", "owner", "service_type"),
+                                           many=True).data
+        stays = StaySerializer(Stay.objects.select_related("dog__owner"), many=True).data
+        return [
+            {"next": None, "previous": None, "results": services},
+            {"next": None, "previous": None, "results": stays},
+            {
+                "id": uuid.uuid4(), "price": Decimal("10.50"), "day": datetime.date(2025, 3, 1),
+                "at": timezone.now(), "hour": datetime.time(9, 30), "text": "ção\u2028linha\u2029nova",
+                1: None, "empty": [],
+            },
+            {"big": 2 ** 64, "negative": -2 ** 70},
+        ]
+
+    def test_renderer(self):
+        for data in self.payloads():
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_renderer(self):
+        data = self.payloads()[0]
+        context = {"indent": 4}
+        self.assertEqual(FastJSONRenderer().render(data, "application/json", context),
+                         JSONRenderer().render(data, "application/json", context))
+
+    def test_parser(self):
+        bodies = [JSONRenderer().render(data) for data in self.payloads()]
+        bodies += [b'{"n": 123456789012345678901234567890, "x": [1.5, -0.0, 1e-05]}', "{\"a\": \"ção\"}".encode()]
+        for body in bodies:
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+    def test_parse_errors(self):
+        for body in (b"{", b'{"a": NaN}'):
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as fast:
+                FastJSONParser().parse(io.BytesIO(body))
+            self.assertEqual(str(fast.exception), str(expected.exception))
+
+
+class OnboardingImportTests(TestCase):
+    HEADER = "name,phone,cpf,dog_name,dog_size,dog_gender\n"
+
+    def csv(self, count, extra=""):
+        lines = [f"Tutor {index},1199999{index:04d},{52998224725 + index * 100:011d},Cão {index},P,M\n"
+                 for index in range(count)]
+        return (self.HEADER + "".join(lines) + extra).encode()
+
+    def test_resumes_after_failure(self):
+        content = self.csv(6)
+        original = onboarding.import_chunk
+        calls = []
+
+        def fail_second_chunk(job_id, start, chunk):
+            calls.append(start)
+            if len(calls) == 2:
+                raise DatabaseError("conexão perdida")
+            return original(job_id, start, chunk)
+
+        with mock.patch.object(onboarding, "import_chunk", fail_second_chunk):
+            job = onboarding.import_file("tutores.csv", content, chunk_size=2)
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertEqual(job.processed_rows, 2)
+
+        job = onboarding.import_file("tutores.csv", content, chunk_size=2)
+        self.assertEqual(job.status, ImportJob.Status.DONE)
+        self.assertEqual((job.processed_rows, job.created_owners, job.created_dogs), (6, 6, 6))
+        self.assertEqual(Dog.objects.count(), 6)
+        self.assertEqual(Health.objects.count(), 6)
+
+        # arquivo já importado: nada a fazer
+        self.assertEqual(onboarding.import_file("tutores.csv", content).pk, job.pk)
+        self.assertEqual(Owner.objects.count(), 6)
+
+    def test_row_errors_do_not_fail_the_job(self):
+        extra = "Curto,11999990000,123,Bob,P,M\nRepetido,11999990001,529.982.247-25,Lua,G,F\n"
+        job = onboarding.import_file("tutores.csv", self.csv(2, extra))
+        self.assertEqual(job.status, ImportJob.Status.DONE)
+        self.assertEqual([error["row"] for error in job.errors], [4])
+        self.assertEqual((job.created_owners, job.reused_owners, job.created_dogs), (2, 1, 3))
+
+    def test_database_error_in_one_row(self):
+        original = onboarding.save_rows
+
+        def reject_tutor_1(rows):
+            if any(row["owner"]["name"] == "Tutor 1" for row in rows):
+                raise DatabaseError("recusada")
+            return original(rows)
+
+        with mock.patch.object(onboarding, "save_rows", reject_tutor_1):
+            job = onboarding.import_file("tutores.csv", self.csv(3))
+        self.assertEqual(job.status, ImportJob.Status.DONE)
+        self.assertEqual([error["row"] for error in job.errors], [3])
+        self.assertEqual(sorted(Owner.objects.values_list("name", flat=True)), ["Tutor 0", "Tutor 2"])
+
+    def test_upload_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "senha"))
+        upload = io.BytesIO(self.csv(2))
+        upload.name = "tutores.csv"
+        response = client.post(reverse("onboarding-import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["status"], ImportJob.Status.DONE)
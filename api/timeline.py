@@ -0,0 +1,185 @@
+import datetime
+import uuid
+
+from django.db.models import CharField, DateField, DateTimeField, DecimalField, F, JSONField, Q, UUIDField, Value
+from django.db.models.functions import Cast
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .functions import NULL_TIMESTAMP, Row, stay_timestamp
+from .models import Stay, ServiceRecord
+
+STAY = "STAY"
+SERVICE = "SERVICE"
+EVENT_KINDS = (STAY, SERVICE)
+
+# colunas do UNION ALL, na mesma ordem nos dois ramos
+COLUMNS = (
+    "id", "event_kind", "timestamp",
+    "check_in", "check_out", "price_total",
+    "service_type_name", "performed_at", "day", "price", "currency", "metadata",
+    "notes", "created_at",
+)
+
+# chaves devolvidas por tipo de evento (mesmo formato da timeline antiga)
+STAY_KEYS = ("id", "check_in", "check_out", "price_total", "notes", "event_kind", "timestamp")
+LAST_ID = uuid.UUID(int=2 ** 128 - 1)
+
+SERVICE_KEYS = ("id", "service_type_name", "performed_at", "day", "price", "currency", "metadata", "notes",
+                "created_at", "event_kind", "timestamp")
+
+
+def _null(field):
+    return Cast(Value(None), output_field=field)
+
+
+def stay_events(dog_id):
+    return Stay.objects.filter(dog_id=dog_id).annotate(
+        event_kind=Value(STAY, output_field=CharField()),
+        timestamp=stay_timestamp(),  # nunca nulo; mesma expressão do índice api_stay_timeline_idx
+        service_type_name=_null(CharField()),
+        performed_at=_null(DateTimeField()),
+        day=_null(DateField()),
+        price=_null(DecimalField(max_digits=10, decimal_places=2)),
+        currency=_null(CharField()),
+        metadata=_null(JSONField()),
+        created_at=_null(DateTimeField()),
+    ).values(*COLUMNS)
+
+
+def service_events(dog_id):
+    return ServiceRecord.objects.filter(dog_id=dog_id).annotate(
+        event_kind=Value(SERVICE, output_field=CharField()),
+        timestamp=F("occurred_at"),
+        check_in=_null(DateTimeField()),
+        check_out=_null(DateTimeField()),
+        price_total=_null(DecimalField(max_digits=10, decimal_places=2)),
+        service_type_name=F("service_type__name"),
+    ).values(*COLUMNS)
+
+
+def ordering():
+    return (F("timestamp").desc(), F("id").desc())
+
+
+def before_filter(position):
+    """
+    Linhas depois de (timestamp, id) na ordem da timeline: `ROW(timestamp, id)
+    < ROW(...)`, que cada ramo resolve como limite do seu índice (dog, timestamp DESC, id DESC).
+    """
+    timestamp, event_id = position
+    return LessThan(
+        Row(F("timestamp"), F("id")),
+        Row(Value(timestamp, output_field=DateTimeField()), Value(event_id, output_field=UUIDField())),
+    )
+
+
+def service_date_filter(timestamp):
+    """
+    event_date <= data local de `timestamp`, redundante com o cursor
+    (event_date é a data local de occurred_at): poda as partições mensais
+    depois do cursor.
+    """
+    try:
+        return Q(event_date__lte=timezone.localdate(timestamp))
+    except OverflowError:  # perto de datetime.min (ex.: NULL_TIMESTAMP): não há serviço antes
+        return Q(pk__in=[])
+
+
+def branches(dog_id, kinds=EVENT_KINDS, before=None, limit=None):
+    """
+    Um queryset por tipo de evento, cada um já filtrado pelo cursor e
+    limitado a `limit` linhas: cada ramo lê só `limit` entradas do seu
+    índice, então o custo da página não cresce com o histórico do cão.
+    """
+    querysets = []
+    for kind, build in ((STAY, stay_events), (SERVICE, service_events)):
+        if kind not in kinds:
+            continue
+        queryset = build(dog_id)
+        if before is not None:
+            queryset = queryset.filter(before_filter(before))
+            if kind == SERVICE:
+                queryset = queryset.filter(service_date_filter(before[0]))
+        queryset = queryset.order_by(*ordering())
+        if limit is not None:
+            queryset = queryset[:limit]
+        querysets.append(queryset)
+    return querysets
+
+
+def timeline_queryset(dog_id, kinds=EVENT_KINDS, before=None, limit=None):
+    """Timeline do cão como um único SELECT ... UNION ALL ... ORDER BY."""
+    first, *rest = branches(dog_id, kinds, before, limit)
+    if not rest:
+        return first
+    queryset = first.union(*rest, all=True).order_by(*ordering())
+    if limit is not None:
+        queryset = queryset[:limit]
+    return queryset
+
+
+async def afetch(dog_id, kinds=EVENT_KINDS, before=None, limit=None):
+    """
+    Versão async da timeline: o mesmo UNION ALL, lido com o ORM async na
+    conexão da requisição (sem thread nem conexão extra por ramo).
+    """
+    return [row async for row in timeline_queryset(dog_id, kinds, before, limit)]
+
+
+def to_event(row):
+    keys = STAY_KEYS if row["event_kind"] == STAY else SERVICE_KEYS
+    event = {key: row[key] for key in keys}
+    if row["event_kind"] == STAY:
+        event["timestamp"] = row["check_in"]  # a ordenação troca check_in nulo por NULL_TIMESTAMP
+    else:
+        # a ordenação usa occurred_at (day vira meia-noite local); a resposta mantém o valor original
+        event["timestamp"] = row["performed_at"] or row["day"] or row["created_at"]
+    return event
+
+
+def parse_kinds(value):
+    if not value:
+        return EVENT_KINDS
+    kinds = tuple(kind.strip().upper() for kind in value.split(",") if kind.strip())
+    invalid = [kind for kind in kinds if kind not in EVENT_KINDS]
+    if invalid:
+        raise ValueError(f"event_kind inválido: {', '.join(invalid)}.")
+    return kinds
+
+
+def parse_query(params, default_limit, max_limit):
+    """(kinds, limit, before) a partir de `?event_kind=&limit=&before=&before_id=`; ValueError se inválido."""
+    kinds = parse_kinds(params.get("event_kind"))
+    limit = min(int(params.get("limit", default_limit)), max_limit)
+    if limit < 1:
+        raise ValueError("limit deve ser positivo.")
+    before = None
+    if "before" in params:
+        before = (parse_timestamp(params["before"]), uuid.UUID(params.get("before_id", str(LAST_ID))))
+    return kinds, limit, before
+
+
+def next_position(rows):
+    """Parâmetros `before`/`before_id` da página seguinte a partir da última linha."""
+    return {"before": format_timestamp(rows[-1]["timestamp"]), "before_id": str(rows[-1]["id"])}
+
+
+def parse_timestamp(value):
+    """Aceita datetime ISO ou data (meia-noite); string vazia (cursores antigos) é o fim da timeline."""
+    if value == "":
+        return NULL_TIMESTAMP
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError("before deve ser uma data ou datetime ISO 8601.")
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def format_timestamp(value):
+    return value.isoformat()
@@ -1,6 +1,6 @@
 from django.urls import include, path
 from rest_framework import routers
-from . import views
+from . import async_views, views
 
 router = routers.DefaultRouter()
 router.register(r'users', views.UserViewSet)
@@ -13,6 +13,21 @@ router.register(r'stays', views.StayViewSet, basename='stay')
 router.register(r'services', views.ServiceRecordViewSet, basename='service-record')
 urlpatterns = [
     path("onboarding/", views.OwnerFullCreateView.as_view(), name="owner-onboarding"),
+    path("onboarding/import/", views.OnboardingImportView.as_view(), name="onboarding-import"),
+    path("onboarding/import/<uuid:pk>/", views.ImportJobDetailView.as_view(), name="onboarding-import-detail"),
+    path("billing/", views.BillingView.as_view(), name="billing"),
+    path("search/", views.SearchView.as_view(), name="search"),
+    path("sync/", views.SyncView.as_view(), name="sync"),
+    path("cache/stats/", views.CacheStatsView.as_view(), name="cache-stats"),
+    path("profiles/", views.ProfileListView.as_view(), name="profile-list"),
+    path("profiles/<str:name>/", views.ProfileDownloadView.as_view(), name="profile-download"),
+    # leitura async (ASGI)
+    path("async/dogs/<uuid:pk>/", async_views.dog_detail, name="async-dog-detail"),
+    path("async/dogs/<uuid:pk>/timeline/", async_views.dog_timeline, name="async-dog-timeline"),
+    path("async/owners/<uuid:pk>/", async_views.owner_detail, name="async-owner-detail"),
+    path("async/stays/", async_views.stay_list, name="async-stay-list"),
+    path("async/services/", async_views.service_list, name="async-service-list"),
+    path("events/", async_views.live_events, name="live-events"),
     path('', include(router.urls)),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework'))
 ]
\ No newline at end of file
@@ -1,17 +1,39 @@
+import secrets
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import Dog, Owner, Health, ServiceType, Stay, ServiceRecord
+from .models import Dog, Owner, Health, ImportJob, ServiceType, Stay, ServiceRecord, BillingRollup, normalize_phone, only_digits
 from django.contrib.auth.models import Group, User
 from rest_framework import permissions, viewsets, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework.utils.urls import replace_query_param
+
+from api import billing, metrics as request_metrics, occupancy, onboarding, profiling, search, sync, timeline
+from api.batch import BatchListMixin
+from api.cache import CachedResponseMixin
+from api import cache as response_cache
+from api.conditional import ConditionalGetMixin, dog_version_token
+from api.expand import ExpandableViewMixin
+from api.exports import ExportMixin
+from api.pagination import StayCursorPagination, ServiceRecordCursorPagination
 
-from api.serializers import (GroupSerializer, UserSerializer, DogSerializer, OwnerSerializer, HealthSerializer,StaySerializer, ServiceTypeSerializer, ServiceRecordSerializer, OwnerFullSerializer)
+from api.serializers import (GroupSerializer, UserSerializer, DogSerializer, OwnerSerializer, HealthSerializer,StaySerializer, ServiceTypeSerializer, ServiceRecordSerializer, OwnerFullSerializer,
+                             ServiceRecordBulkSerializer, BillingSummarySerializer, OwnerLookupSerializer,
+                             ImportJobSerializer)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -32,6 +54,147 @@ class GroupViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
+def billing_month(request):
+    """Mês de `?month=YYYY-MM` (padrão: mês corrente)."""
+    value = request.query_params.get("month")
+    if not value:
+        return billing.month_of(timezone.now())
+    try:
+        return billing.parse_month(value)
+    except ValueError:
+        raise ValidationError({"month": "Use o formato YYYY-MM."})
+
+
+def query_date(request, name, default):
+    """Data de `?<name>=YYYY-MM-DD` (ou `default`)."""
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Use o formato YYYY-MM-DD."})
+    return parsed
+
+
+class BillingView(generics.GenericAPIView):
+    """
+    Faturamento da loja no mês (`?month=YYYY-MM`), somando todos os tutores.
+    Lido só da tabela BillingRollup. Só staff.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    queryset = BillingRollup.objects.all()
+    serializer_class = BillingSummarySerializer
+
+    def get(self, request):
+        month = billing_month(request)
+        lines, totals = billing.summary(month)
+        return Response(BillingSummarySerializer({"month": month, "lines": lines, "totals": totals}).data)
+
+
+class SearchView(APIView):
+    """
+    Busca unificada `?q=` em tutores (nome), cães (nome e raça) e
+    observações de serviços, ignorando maiúsculas e acentos ("joao" acha
+    "João"). Usa os índices GIN trigram; `?limit=` por grupo (padrão 10).
+    Devolve dados dos tutores, então exige login.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
+    min_query_length = 2
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if len(text) < self.min_query_length:
+            raise ValidationError({"q": f"Informe ao menos {self.min_query_length} caracteres."})
+        try:
+            limit = min(int(request.query_params.get("limit", self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "Deve ser um número inteiro."})
+        return Response(search.search(text, max(limit, 1)))
+
+
+class CacheStatsView(APIView):
+    """Hits/misses do cache de respostas neste processo, por view (só staff)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        options = response_cache.cache_settings()
+        return Response({
+            "backend": type(response_cache.get_cache()).__name__,
+            "alias": options["ALIAS"],
+            "timeout": options["TIMEOUT"],
+            "views": response_cache.stats(),
+        })
+
+
+def metrics(request):
+    """
+    Métricas de todos os workers no formato do Prometheus (`GET /metrics`).
+    Exige `Authorization: Bearer <DOGDEX_METRICS["TOKEN"]>` ou usuário staff logado.
+    """
+    token = request_metrics.metrics_settings()["TOKEN"]
+    bearer = bool(token) and secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not (bearer or request.user.is_staff):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ProfileListView(APIView):
+    """Perfis de requisições guardados pelo ProfilingMiddleware (api/profiling.py), do mais novo. Só staff."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(profiling.profiles())
+
+
+class ProfileDownloadView(APIView):
+    """
+    Baixa um perfil: `.prof` (pstats; `python -m pstats`, snakeviz) ou
+    `.collapsed` (stacks para flamegraph.pl/speedscope). Só staff.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, name):
+        try:
+            path, mode = profiling.profile_file(name)
+        except LookupError:
+            raise Http404("Perfil não encontrado.")
+        content_type = "application/octet-stream" if mode == "cprofile" else "text/plain; charset=utf-8"
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name, content_type=content_type)
+
+
+class SyncView(APIView):
+    """
+    Delta para os tablets offline (api/sync.py): sem `?since=` devolve tudo;
+    com o token `next` da resposta anterior, só o que mudou ou foi removido
+    depois dele. Repita com o `next` enquanto `has_more` for true e guarde o
+    último; remoções (`deleted`) valem sobre o que já estava no tablet.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter("since", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 0)) or None
+        except ValueError:
+            raise ValidationError({"limit": "Deve ser um número inteiro."})
+        if limit is not None and limit < 1:
+            raise ValidationError({"limit": "Deve ser positivo."})
+        try:
+            return Response(sync.changes(request.query_params.get("since"), limit))
+        except sync.TokenExpired as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_410_GONE)
+        except sync.TokenError as exc:
+            raise ValidationError({"since": str(exc)})
+
+
 class OwnerFullCreateView(generics.CreateAPIView):
     """
     Endpoint para cadastrar Tutor + Dog + Health de uma vez.
@@ -49,26 +212,70 @@ class OwnerFullCreateView(generics.CreateAPIView):
         )
 
 
-class DogViewSet(viewsets.ModelViewSet):
+class OnboardingImportView(APIView):
+    """
+    Importa cadastros em lote de uma planilha CSV/XLSX (campo `file`, ver
+    api/onboarding.py). Reenviar o mesmo arquivo retoma a importação
+    interrompida; `?restart=1` força uma nova. Só staff.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("file", openapi.IN_FORM, type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter("restart", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: ImportJobSerializer},
+    )
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Envie a planilha no campo file."})
+        restart = request.query_params.get("restart") in ("1", "true")
+        try:
+            job = onboarding.import_file(upload.name, upload.read(), restart=restart)
+        except onboarding.ImportFileError as exc:
+            raise ValidationError({"file": str(exc)})
+        return Response(ImportJobSerializer(job).data)
+
+
+class ImportJobDetailView(generics.RetrieveAPIView):
+    """Progresso e relatório de erros por linha de uma importação."""
+    permission_classes = [permissions.IsAdminUser]
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+
+class DogViewSet(ConditionalGetMixin, CachedResponseMixin, BatchListMixin, ExpandableViewMixin, viewsets.ModelViewSet):
     queryset = Dog.objects.all()
     serializer_class = DogSerializer
+    batch_expand = "owner,health"
+    cache_dependencies = (Dog, Owner, Health, Stay)
+    etag_actions = {"retrieve": "dog_etag", "timeline": "dog_etag"}
+    timeline_page_size = 50
+    timeline_max_page_size = 200
+
+    def dog_etag(self, request, *args, **kwargs):
+        return dog_version_token(kwargs["pk"])
 
     def retrieve(self, request, *args, **kwargs):
+        """
+        Sem `?expand=`/`?fields=` devolve {"dog", "owner"}; com eles, o cão no
+        formato do DogSerializer (ex.: `?expand=owner,health,last_stay`).
+        """
+        if self.get_expand() or self.get_fields():
+            return super().retrieve(request, *args, **kwargs)
         try:
-            dog = Dog.objects.get(pk=kwargs['pk'])
-            dog_serialized = DogSerializer(dog).data
-        except Dog.DoesNotExist:
+            dog = Dog.objects.select_related("owner").get(pk=kwargs['pk'])
+        except (Dog.DoesNotExist, DjangoValidationError):  # inexistente ou pk que não é UUID
             return  Response({"error": "Dog not found"} ,status=404)
 
-        try:
-            owner = Owner.objects.get(pk=dog.owner_id)
-        except Owner.DoesNotExist:
-            return  Response({"error": "Owner not found"} ,status=404)
-
+        dog_serialized = DogSerializer(dog).data
         dog_serialized.pop("owner", None)
         return Response({
             "dog": dog_serialized,
-            "owner": OwnerSerializer(owner).data,
+            "owner": OwnerSerializer(dog.owner).data,
         })
 
     # timeline_schema = openapi.Response(
@@ -88,33 +295,45 @@ class DogViewSet(viewsets.ModelViewSet):
     # @swagger_auto_schema(responses={200: timeline_schema})
     @action(detail=True, methods=["get"], url_path="timeline")
     def timeline(self, request, pk=None):
-        """Retorna a timeline unificada do cão (stays + services)."""
+        """
+        Retorna a timeline unificada do cão (stays + services), mais recente primeiro.
+
+        Montada no banco com UNION ALL e paginada por keyset:
+        `?limit=` (padrão 50), `?event_kind=STAY|SERVICE` e o link `next`,
+        que carrega `before`/`before_id` do último evento da página.
+        """
         dog = self.get_object()
-        stays = list(Stay.objects.filter(dog=dog).values("id", "check_in", "check_out", "price_total", "notes"))
-        for s in stays:
-            s.update({
-                "event_kind": "STAY",
-                "timestamp": s["check_in"],
-            })
-        services = list(ServiceRecord.objects.filter(dog=dog).values("id", "service_type__name", "performed_at", "day",
-                                                                 "price", "currency", "metadata", "notes", "created_at"))
-        for e in services:
-            e.update({
-                "event_kind": "SERVICE",
-                "service_type_name": e.pop("service_type__name"),
-                "timestamp": e["performed_at"] or e["day"],
-            })
-        merged = stays + services
-        merged.sort(key=lambda x: (x["timestamp"] or x.get("created_at")), reverse=True)
-        return Response(merged)
-
-
-
-class OwnerViewSet(viewsets.ModelViewSet):
+        try:
+            kinds, limit, before = timeline.parse_query(
+                request.query_params, self.timeline_page_size, self.timeline_max_page_size)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        rows = list(timeline.timeline_queryset(dog.pk, kinds, before, limit + 1))
+        next_link = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_link = request.build_absolute_uri()
+            for key, value in timeline.next_position(rows).items():
+                next_link = replace_query_param(next_link, key, value)
+        return Response({
+            "next": next_link,
+            "results": [timeline.to_event(row) for row in rows],
+        })
+
+
+class OwnerViewSet(CachedResponseMixin, BatchListMixin, ExpandableViewMixin, viewsets.ModelViewSet):
     queryset = Owner.objects.all().order_by("name")
     serializer_class = OwnerSerializer
+    cache_dependencies = (Owner, Dog, Health, Stay)
 
     def retrieve(self, request, *args, **kwargs):
+        """
+        Sem `?expand=`/`?fields=` devolve {"owner", "dogs"}; com eles, o tutor
+        no formato do OwnerSerializer (ex.: `?expand=dogs,dogs.health`).
+        """
+        if self.get_expand() or self.get_fields():
+            return super().retrieve(request, *args, **kwargs)
         try:
             owner = self.get_object()
         except Owner.DoesNotExist:
@@ -126,6 +345,43 @@ class OwnerViewSet(viewsets.ModelViewSet):
             "owner": OwnerSerializer(owner).data,
             "dogs": list(dogs.values())
         })
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter("phone", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter("cpf", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+    ])
+    @action(detail=False, methods=["get"], url_path="lookup", serializer_class=OwnerLookupSerializer)
+    def lookup(self, request):
+        """
+        Busca exata do tutor por `?phone=` ou `?cpf=` em qualquer formatação,
+        com os cães ativos e flags de saúde (2 queries).
+        """
+        if request.query_params.get("cpf"):
+            name, digits = "cpf", only_digits(request.query_params["cpf"])
+            owners = Owner.objects.filter(cpf_digits=digits)
+        elif request.query_params.get("phone"):
+            name, digits = "phone", normalize_phone(request.query_params["phone"])
+            owners = Owner.objects.filter(phone_digits=digits)
+        else:
+            raise ValidationError("Informe phone ou cpf.")
+        if not digits:  # "abc" casaria com os tutores sem nenhum dígito cadastrado
+            raise ValidationError({name: "Informe ao menos um dígito."})
+
+        owners = owners.order_by("name").prefetch_related(Prefetch(
+            "dogs",
+            queryset=Dog.objects.filter(is_active=True).select_related("health").order_by("name"),
+            to_attr="active_dogs",
+        ))
+        return Response(OwnerLookupSerializer(owners, many=True).data)
+
+    @action(detail=True, methods=["get"], url_path="billing", serializer_class=BillingSummarySerializer,
+            permission_classes=[permissions.IsAdminUser])
+    def billing(self, request, pk=None):
+        """Fatura do tutor no mês (`?month=YYYY-MM`), lida da tabela BillingRollup. Só staff."""
+        owner = self.get_object()
+        month = billing_month(request)
+        lines, totals = billing.summary(month, owner=owner)
+        return Response(BillingSummarySerializer({"owner": owner.pk, "month": month, "lines": lines, "totals": totals}).data)
     # @action(methods=['GET'],detail=True, url_path='dogs')
     # def search_owner_detail(self, request, *args, **kwargs):
     #     try:
@@ -138,28 +394,98 @@ class OwnerViewSet(viewsets.ModelViewSet):
     #     })
 
 
-class HealthViewSet(viewsets.ModelViewSet):
+class HealthViewSet(CachedResponseMixin, BatchListMixin, ExpandableViewMixin, viewsets.ModelViewSet):
     queryset = Health.objects.all()
     serializer_class = HealthSerializer
+    cache_dependencies = (Health,)
 
 
-class ServiceTypeViewSet(viewsets.ModelViewSet):
+class ServiceTypeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = ServiceType.objects.all().order_by("name")
     serializer_class = ServiceTypeSerializer
+    cache_dependencies = (ServiceType,)
 
 
-class StayViewSet(viewsets.ModelViewSet):
+class StayViewSet(ExportMixin, ExpandableViewMixin, viewsets.ModelViewSet):
     queryset = Stay.objects.all().select_related("dog", "dog__owner").all()
     serializer_class = StaySerializer
+    pagination_class = StayCursorPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ["dog", "owner"]
-    ordering_fields = ["check_in", "check_out"]
+    filterset_fields = {
+        "dog": ["exact"],
+        "owner": ["exact"],
+        "services_total": ["exact", "gte", "lte"],
+    }
+    ordering_fields = ["check_in", "check_out", "price_total", "services_total"]
+    export_fields = ["id", "dog", "dog__name", "owner", "owner__name", "check_in", "check_out",
+                     "price_total", "services_total", "notes"]
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter("from", openapi.IN_QUERY, type=openapi.TYPE_STRING, format="date"),
+        openapi.Parameter("to", openapi.IN_QUERY, type=openapi.TYPE_STRING, format="date"),
+        openapi.Parameter("size", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=Dog.Size.values),
+    ])
+    @action(detail=False, methods=["get"], url_path="occupancy")
+    def occupancy(self, request):
+        """
+        Cães hospedados em cada dia de `?from=` a `?to=` (YYYY-MM-DD; padrão:
+        hoje e os próximos 60 dias), no total e por porte; `?size=` filtra.
+        """
+        start = query_date(request, "from", timezone.localdate())
+        end = query_date(request, "to", start + timedelta(days=occupancy.DEFAULT_DAYS - 1))
+        if end < start or (end - start).days >= occupancy.MAX_DAYS:
+            raise ValidationError({"to": f"Período deve ter de 1 a {occupancy.MAX_DAYS} dias."})
+        size = request.query_params.get("size") or None
+        if size is not None and size not in Dog.Size.values:
+            raise ValidationError({"size": f"Use um de: {', '.join(Dog.Size.values)}."})
+        return Response({
+            "from": start,
+            "to": end,
+            "size": size,
+            "days": occupancy.occupancy(start, end, size),
+        })
 
 
-class ServiceRecordViewSet(viewsets.ModelViewSet):
+class ServiceRecordViewSet(ExportMixin, BatchListMixin, ExpandableViewMixin, viewsets.ModelViewSet):
     queryset = ServiceRecord.objects.select_related("dog", "owner", "service_type").all()
     serializer_class = ServiceRecordSerializer
+    pagination_class = ServiceRecordCursorPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ["dog", "owner", "service_type", "day"]
     search_fields = ["dog__name", "owner__name", "notes"]
-    ordering_fields = ["performed_at", "day", "created_at", "price"]
\ No newline at end of file
+    ordering_fields = ["occurred_at", "performed_at", "day", "created_at", "price"]
+    export_fields = ["id", "dog", "dog__name", "owner", "owner__name", "service_type", "service_type__name",
+                     "performed_at", "day", "stay", "price", "currency", "metadata", "notes", "created_at"]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # ?day= (já validado pelo filterset) é também a chave de partição: lê só a partição do mês
+        day = parse_date(self.request.query_params.get("day") or "")
+        if day is not None:
+            queryset = queryset.filter(event_date=day)
+        return queryset
+
+    @swagger_auto_schema(request_body=ServiceRecordBulkSerializer)
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Cadastra vários ServiceRecord de uma vez.
+
+        Aceita `{"records": [...], "atomic": false}` ou a lista direto no corpo
+        (com `?atomic=true`). Sem `atomic`, as linhas válidas são gravadas e
+        os erros voltam por índice (207); com `atomic`, qualquer erro devolve
+        400 sem gravar nada.
+        """
+        data = request.data
+        if isinstance(data, list):
+            data = {"records": data, "atomic": request.query_params.get("atomic", False)}
+        serializer = ServiceRecordBulkSerializer(data=data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        created, errors = serializer.save()
+
+        if errors and serializer.validated_data["atomic"]:
+            return Response({"created": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"created": ServiceRecordSerializer(created, many=True).data, "errors": errors},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED,
+        )
\ No newline at end of file